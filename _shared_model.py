@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Shared Ollama chat model for the test_*.py scripts
+Every script gets the same resident model through one identified client
+"""
+
+import functools
+import os
+from agents.llm_detector import preload_ollama_model
+from agents.llm_factory import get_llm_instance
+
+# Stable client identity sent with every request from the test scripts
+CLIENT_HEADERS = {"X-Client-Id": "test-suite"}
+
+@functools.lru_cache(maxsize=4)
+def get_model(model_name: str = None):
+    """
+    Get the shared ChatOllama instance for a model, loading it on first use
+    
+    Args:
+        model_name: Ollama model, defaults to LLM_MODEL (or qwen2.5:7b)
+    
+    Returns:
+        ChatOllama with keep_alive=-1, already loaded into memory
+    """
+    base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    model_name = model_name or os.getenv("LLM_MODEL", "qwen2.5:7b")
+    
+    model = get_llm_instance(
+        "ollama",
+        model_name,
+        base_url=base_url,
+        temperature=0,
+        keep_alive=-1,
+        client_kwargs={"headers": CLIENT_HEADERS}
+    )
+    # Load the model now so the first invoke doesn't pay the cold start
+    preload_ollama_model(model_name, base_url=base_url)
+    return model
@@ -1,10 +1,127 @@
 from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import ToolNode, tools_condition
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from tools.data_tools import profile_table, plot_chart
-from agents.llm_detector import get_llm_config, detect_system_capacity, detect_available_llms
+from agents.llm_detector import get_llm_config
 from agents.llm_factory import get_llm_instance
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import json
+import logging
 import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+TOOLS = [profile_table, plot_chart]
+
+# Tool JSON schemas are a pure function of the tool objects; build them once.
+# The OpenAI tool format is accepted by bind_tools for every provider.
+_TOOL_SCHEMAS = [convert_to_openai_tool(t) for t in TOOLS]
+
+# Stable instructions sent ahead of Anthropic conversations as a prompt-cache
+# breakpoint. Anthropic only caches prefixes above a minimum length (1024-2048
+# tokens depending on the model), which the tool schemas plus this prompt don't
+# reach yet; the marker takes effect once the prefix grows past it. Other
+# providers get no system prompt, as before.
+SYSTEM_PROMPT = (
+    "You are a data analysis assistant working with CSV files in the data/ folder. "
+    "Use profile_table to inspect a file's columns and statistics before drawing "
+    "conclusions, and plot_chart to visualize a column over another; charts are saved "
+    "under outputs/. Answer concisely and mention the path of any chart you create."
+)
+
+# Tool-bound models keyed on id(model); the model itself is kept in the value
+# so its id cannot be recycled while the entry exists
+_BOUND_MODELS = {}
+
+# Tools whose output depends only on their arguments and the file they read.
+# Their results are reused across turns and sessions until the file changes.
+PURE_TOOLS = {"profile_table"}
+TOOL_CACHE_SIZE = 128
+_TOOL_CACHE = OrderedDict()
+_TOOL_CACHE_LOCK = threading.Lock()
+
+def _tool_cache_key(name: str, args: dict):
+    """Key a pure tool call on its name, arguments and input file stat, or None"""
+    try:
+        st = os.stat(args["file"])
+    except (KeyError, TypeError, OSError):
+        return None
+    return (name, json.dumps(args, sort_keys=True, default=str), st.st_mtime_ns, st.st_size)
+
+def _memoize_tool(tool):
+    """Wrap a pure tool so calls on an unchanged file reuse the earlier result
+    
+    The wrapper keeps the tool's name, description and argument schema, so it
+    works in both the parallel tool node and the prebuilt ToolNode. Failed
+    calls raise as before and are not cached.
+    """
+    def run(**kwargs):
+        key = _tool_cache_key(tool.name, kwargs)
+        if key is not None:
+            with _TOOL_CACHE_LOCK:
+                content = _TOOL_CACHE.get(key)
+                if content is not None:
+                    _TOOL_CACHE.move_to_end(key)
+                    return content
+        
+        content = str(tool.func(**kwargs))
+        
+        if key is not None:
+            with _TOOL_CACHE_LOCK:
+                _TOOL_CACHE[key] = content
+                if len(_TOOL_CACHE) > TOOL_CACHE_SIZE:
+                    _TOOL_CACHE.popitem(last=False)
+        return content
+    
+    return StructuredTool.from_function(
+        func=run,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema
+    )
+
+# The tools the graph executes, with pure tools memoized
+_NODE_TOOLS = [_memoize_tool(t) if t.name in PURE_TOOLS else t for t in TOOLS]
+
+def _parallel_tools_enabled() -> bool:
+    """Check whether tool calls from one LLM turn should run concurrently"""
+    return os.getenv("ENABLE_PARALLEL_TOOL_EXECUTION", "true").lower() == "true"
+
+def _make_parallel_tool_node(tools):
+    """Build a tool node that executes all tool calls of a turn concurrently"""
+    tools_by_name = {t.name: t for t in tools}
+    
+    def _invoke_tool(call):
+        tool = tools_by_name.get(call["name"])
+        if tool is None:
+            content = f"Error: {call['name']} is not a valid tool, try one of {list(tools_by_name)}."
+        else:
+            try:
+                content = tool.invoke(call["args"])
+            except Exception as e:
+                content = f"Error: {e!r}\n Please fix your mistakes."
+        return ToolMessage(content=str(content), name=call["name"], tool_call_id=call["id"])
+    
+    def parallel_tools(state):
+        calls = state["messages"][-1].tool_calls
+        if len(calls) <= 1:
+            return {"messages": [_invoke_tool(c) for c in calls]}
+        with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+            return {"messages": list(executor.map(_invoke_tool, calls))}
+    
+    async def aparallel_tools(state):
+        calls = state["messages"][-1].tool_calls
+        results = await asyncio.gather(*[asyncio.to_thread(_invoke_tool, c) for c in calls])
+        return {"messages": list(results)}
+    
+    return RunnableLambda(parallel_tools, afunc=aparallel_tools, name="tools")
 
 def build_graph():
     """Build the LangGraph agent with auto-detected or configured LLM"""
@@ -16,52 +133,83 @@ def build_graph():
         model_name = config["model"]
         supports_tools = config["supports_tools"]
         
-        # Display configuration info
-        print("=" * 50)
-        print("LLM Configuration:")
-        print(f"  Provider: {provider}")
-        print(f"  Model: {model_name}")
-        print(f"  Tool Support: {'Yes' if supports_tools else 'No'}")
+        # Report configuration info
+        logger.info("LLM configuration: provider=%s model=%s tool_support=%s",
+                    provider, model_name, "yes" if supports_tools else "no")
         
         system_cap = config["system_capacity"]
-        print(f"\nSystem Capacity:")
-        print(f"  CPU Cores: {system_cap['cpu_cores']}")
-        print(f"  Memory: {system_cap['memory_gb']:.1f} GB")
+        logger.info("System capacity: cpu_cores=%s memory=%.1f GB",
+                    system_cap['cpu_cores'], system_cap['memory_gb'])
         if system_cap['gpu_available']:
-            print(f"  GPU: Yes ({system_cap.get('gpu_type', 'NVIDIA')})")
-            if 'gpu_memory_gb' in system_cap:
-                print(f"  GPU Memory: {system_cap['gpu_memory_gb']:.1f} GB")
-        print("=" * 50)
+            logger.info("GPU: %s (%.1f GB)", system_cap.get('gpu_type', 'NVIDIA'),
+                        system_cap.get('gpu_memory_gb', 0))
         
     except Exception as e:
-        print(f"Error detecting LLM configuration: {e}")
+        logger.warning("Error detecting LLM configuration: %s", e)
         # Fall back to manual configuration
         provider = os.getenv("LLM_PROVIDER", "ollama")
         model_name = os.getenv("LLM_MODEL", "qwen2.5:7b")
         supports_tools = True
     
+    return _compile_graph(provider, model_name, supports_tools)
+
+def _bind_tools(model):
+    """Bind the precomputed tool schemas to a model once per model instance"""
+    entry = _BOUND_MODELS.get(id(model))
+    if entry is None:
+        entry = _BOUND_MODELS[id(model)] = (model, model.bind_tools(_TOOL_SCHEMAS))
+    return entry[1]
+
+def _system_messages(provider: str) -> list:
+    """Build the messages prepended to each LLM call: a cache-marked system prompt for Anthropic, none otherwise"""
+    if provider == "anthropic":
+        return [SystemMessage(content=[
+            {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+        ])]
+    return []
+
+def _make_llm_node(model_with_tools, prefix):
+    """Create the LLM node bound to the given model
+    
+    The node runs natively async under graph.ainvoke/astream (no worker thread
+    blocked on the HTTP round-trip) and keeps a sync path for graph.invoke.
+    The prefix messages are prepended to each call, not stored in the state.
+    """
+    def llm_node(state):
+        return {"messages": [model_with_tools.invoke(prefix + state["messages"])]}
+    
+    async def allm_node(state):
+        return {"messages": [await model_with_tools.ainvoke(prefix + state["messages"])]}
+    
+    return RunnableLambda(llm_node, afunc=allm_node, name="llm")
+
+@functools.lru_cache(maxsize=4)
+def _compile_graph(provider: str, model_name: str, supports_tools: bool):
+    """Compile the agent graph once per (provider, model, tool support) combination"""
+    
     # Get the LLM instance
     model = get_llm_instance(provider, model_name)
     
     # Bind tools to the model
-    tools = [profile_table, plot_chart]
-    
     if not supports_tools:
-        print(f"Warning: Model {model_name} may not support tool calling.")
+        logger.warning("Model %s may not support tool calling.", model_name)
         model_with_tools = model
     else:
         try:
-            model_with_tools = model.bind_tools(tools)
+            model_with_tools = _bind_tools(model)
         except Exception as e:
-            print(f"Warning: Could not bind tools to {model_name}: {e}")
-            print("The model will run without tool support.")
+            logger.warning("Could not bind tools to %s: %s. The model will run without tool support.",
+                           model_name, e)
             model_with_tools = model
     
     # Build the graph
-    tool_node = ToolNode(tools)
+    if _parallel_tools_enabled():
+        tool_node = _make_parallel_tool_node(_NODE_TOOLS)
+    else:
+        tool_node = ToolNode(_NODE_TOOLS)
     graph = StateGraph(dict)
     
-    graph.add_node("llm", lambda s: {"messages": [model_with_tools.invoke(s["messages"])]})
+    graph.add_node("llm", _make_llm_node(model_with_tools, _system_messages(provider)))
     graph.add_node("tools", tool_node)
     graph.add_edge(START, "llm")
     graph.add_conditional_edges("llm", tools_condition, {"tools": "tools", END: END})
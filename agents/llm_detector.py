@@ -4,12 +4,34 @@ Detects available LLMs and system capacity to select the best model
 """
 
 import os
-import json
+import ctypes
+import ctypes.util
+import functools
+import logging
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 import subprocess
 import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, Tuple
 
+logger = logging.getLogger(__name__)
+
+# Resolved once at import; the environment does not change during a process
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+
+# Minimum seconds between repeated progress lines while pulling a model
+PULL_PROGRESS_INTERVAL = 0.5
+
+# Pooled keep-alive session shared by all Ollama HTTP probes
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=0))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=0))
+_SESSION.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip, deflate"})
+
 # Models that support tool calling
 TOOL_CAPABLE_MODELS = {
     "ollama": [
@@ -31,8 +53,81 @@ TOOL_CAPABLE_MODELS = {
     ]
 }
 
+def _model_family(model_name: str) -> str:
+    """Reduce a model name to its family, e.g. 'qwen2.5:7b' -> 'qwen2.5', 'gpt-4o' -> 'gpt'"""
+    return model_name.split(":", 1)[0].split("-", 1)[0]
+
+# Precomputed model families per provider for O(1) tool-support lookups
+_TOOL_CAPABLE_FAMILIES = {
+    provider: frozenset(_model_family(m) for m in models)
+    for provider, models in TOOL_CAPABLE_MODELS.items()
+}
+
+# Model recommendations as (resource, minimum GB, model), checked in order;
+# "gpu" rows only apply when a GPU was detected
+_RECOMMENDED_MODELS = (
+    ("gpu", 24, "llama3.1:70b"),
+    ("gpu", 8, "qwen2.5:14b"),
+    ("memory", 16, "qwen2.5:7b"),
+    ("memory", 8, "llama3.2:3b"),
+    ("memory", 0, "llama3.2:1b"),
+)
+
+def _recommend_model(capacity: Dict[str, Any]) -> str:
+    """Pick the largest recommended model the detected resources can run"""
+    available_gb = {
+        "gpu": capacity.get("gpu_memory_gb", 0) if capacity["gpu_available"] else -1,
+        "memory": capacity["memory_gb"],
+    }
+    for resource, minimum_gb, model in _RECOMMENDED_MODELS:
+        if available_gb[resource] >= minimum_gb:
+            return model
+    return _RECOMMENDED_MODELS[-1][2]
+
+def _read_macos_memsize() -> int:
+    """Read hw.memsize in bytes via libc sysctlbyname, falling back to the sysctl binary"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"))
+        memsize = ctypes.c_uint64(0)
+        length = ctypes.c_size_t(ctypes.sizeof(memsize))
+        if libc.sysctlbyname(b"hw.memsize", ctypes.byref(memsize), ctypes.byref(length), None, 0) == 0:
+            return memsize.value
+    except (OSError, AttributeError, TypeError):
+        pass
+    
+    result = subprocess.run(['sysctl', '-n', 'hw.memsize'], 
+                          capture_output=True, text=True, check=True)
+    return int(result.stdout.strip())
+
+def _read_nvidia_gpu_memory_mb() -> Optional[int]:
+    """Get total memory of the first NVIDIA GPU in MiB, or None if there is none"""
+    try:
+        import pynvml
+    except ImportError:
+        pynvml = None
+    
+    if pynvml is not None:
+        # NVML answers in-process without forking nvidia-smi
+        try:
+            pynvml.nvmlInit()
+            try:
+                handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+                return pynvml.nvmlDeviceGetMemoryInfo(handle).total // (1024 * 1024)
+            finally:
+                pynvml.nvmlShutdown()
+        except pynvml.NVMLError:
+            return None
+    
+    try:
+        result = subprocess.run(['nvidia-smi', '--query-gpu=memory.total', '--format=csv,noheader,nounits'], 
+                                capture_output=True, text=True, check=True)
+        return int(result.stdout.strip().split('\n')[0])
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+@functools.lru_cache(maxsize=1)
 def detect_system_capacity() -> Dict[str, Any]:
-    """Detect system capacity for running local models"""
+    """Detect system capacity for running local models (cached per process)"""
     capacity = {
         "cpu_cores": os.cpu_count(),
         "memory_gb": 0,
@@ -52,22 +147,16 @@ def detect_system_capacity() -> Dict[str, Any]:
                         capacity["memory_gb"] = int(line.split()[1]) / (1024 * 1024)
                         break
         elif platform.system() == "Darwin":  # macOS
-            result = subprocess.run(['sysctl', '-n', 'hw.memsize'], 
-                                  capture_output=True, text=True, check=True)
-            capacity["memory_gb"] = int(result.stdout.strip()) / (1024**3)
+            capacity["memory_gb"] = _read_macos_memsize() / (1024**3)
         elif platform.system() == "Windows":
             import psutil
             capacity["memory_gb"] = psutil.virtual_memory().total / (1024**3)
         
         # Check for GPU (NVIDIA)
-        try:
-            result = subprocess.run(['nvidia-smi', '--query-gpu=memory.total', '--format=csv,noheader,nounits'], 
-                                    capture_output=True, text=True, check=True)
-            gpu_memory = int(result.stdout.strip().split('\n')[0])
+        gpu_memory = _read_nvidia_gpu_memory_mb()
+        if gpu_memory is not None:
             capacity["gpu_available"] = True
             capacity["gpu_memory_gb"] = gpu_memory / 1024
-        except:
-            pass
         
         # Check for Apple Silicon (Metal)
         if platform.system() == "Darwin" and platform.machine() == "arm64":
@@ -75,70 +164,121 @@ def detect_system_capacity() -> Dict[str, Any]:
             capacity["gpu_type"] = "apple_silicon"
         
         # Recommend model based on capacity
-        if capacity["gpu_available"] and capacity.get("gpu_memory_gb", 0) >= 24:
-            capacity["recommended_model"] = "llama3.1:70b"
-        elif capacity["gpu_available"] and capacity.get("gpu_memory_gb", 0) >= 8:
-            capacity["recommended_model"] = "qwen2.5:14b"
-        elif capacity["memory_gb"] >= 16:
-            capacity["recommended_model"] = "qwen2.5:7b"
-        elif capacity["memory_gb"] >= 8:
-            capacity["recommended_model"] = "llama3.2:3b"
-        else:
-            capacity["recommended_model"] = "llama3.2:1b"
+        capacity["recommended_model"] = _recommend_model(capacity)
             
     except Exception as e:
-        print(f"Warning: Could not detect system capacity: {e}")
+        logger.warning("Could not detect system capacity: %s", e)
         capacity["recommended_model"] = "qwen2.5:7b"  # Default
     
     return capacity
 
+@functools.lru_cache(maxsize=1)
+def _request_ollama_tags() -> Tuple[str, ...]:
+    """
+    Request installed model names from Ollama's /api/tags
+    
+    Only successful responses are cached: a failure raises, so the next call
+    probes Ollama again instead of reporting it unreachable for good.
+    
+    Returns:
+        Tuple of model names
+    """
+    response = _SESSION.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=2)
+    response.raise_for_status()
+    models = response.json().get("models", [])
+    return tuple(m["name"] for m in models)
+
+def _fetch_ollama_tags() -> Optional[Tuple[str, ...]]:
+    """
+    Fetch installed model names from Ollama's /api/tags
+    
+    Model listing, the connectivity check and the pre-pull existence check all
+    need this response, so it is requested once and shared.
+    
+    Returns:
+        Tuple of model names, or None if Ollama is not reachable
+    """
+    try:
+        return _request_ollama_tags()
+    except requests.RequestException:
+        return None
+
 def detect_ollama_models() -> list:
     """Detect available Ollama models"""
-    try:
-        ollama_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-        response = requests.get(f"{ollama_url}/api/tags", timeout=2)
-        if response.status_code == 200:
-            models = response.json().get("models", [])
-            return [m["name"] for m in models]
-    except:
-        pass
-    return []
+    return list(_fetch_ollama_tags() or [])
 
 def pull_ollama_model(model_name: str) -> bool:
     """Pull an Ollama model if not available"""
     try:
-        ollama_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-        
         # Check if model exists
-        response = requests.get(f"{ollama_url}/api/tags", timeout=2)
-        if response.status_code == 200:
-            models = response.json().get("models", [])
-            existing = [m["name"] for m in models]
-            if any(model_name in m for m in existing):
-                return True
+        existing = _fetch_ollama_tags() or ()
+        if any(model_name in m for m in existing):
+            return True
         
         # Pull the model
         print(f"Pulling model {model_name}... This may take a few minutes.")
-        response = requests.post(
-            f"{ollama_url}/api/pull",
+        with _SESSION.post(
+            f"{OLLAMA_BASE_URL}/api/pull",
             json={"name": model_name},
             stream=True,
             timeout=600
-        )
-        
-        for line in response.iter_lines():
-            if line:
-                data = json.loads(line)
-                if "status" in data:
-                    print(f"  {data['status']}")
+        ) as response:
+            # Split the NDJSON stream on raw bytes and only echo a status when it
+            # changes or every PULL_PROGRESS_INTERVAL seconds; progress events
+            # repeat the same status hundreds of times per second
+            buffer = b""
+            last_status = None
+            last_time = 0.0
+            for chunk in response.iter_content(chunk_size=8192):
+                buffer += chunk
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    if not line.strip():
+                        continue
+                    status = orjson.loads(line).get("status")
+                    now = time.monotonic()
+                    if status and (status != last_status or now - last_time > PULL_PROGRESS_INTERVAL):
+                        sys.stdout.write(f"  {status}\n")
+                        last_status, last_time = status, now
+            sys.stdout.flush()
         
+        # The installed model list changed
+        _request_ollama_tags.cache_clear()
         return True
     except Exception as e:
-        print(f"Failed to pull model {model_name}: {e}")
+        logger.error("Failed to pull model %s: %s", model_name, e)
+        return False
+
+def preload_ollama_model(model_name: str, keep_alive: Any = -1, base_url: Optional[str] = None) -> bool:
+    """
+    Load an Ollama model into memory ahead of the first request
+    
+    A generate request without a prompt only loads the model, so the first real
+    invoke does not pay the cold-load time. keep_alive=-1 keeps it resident
+    until Ollama is restarted.
+    
+    Args:
+        model_name: Ollama model to load
+        keep_alive: Seconds (or a duration string such as "30m") to keep the model loaded; -1 for indefinitely
+        base_url: Ollama server URL, defaults to OLLAMA_BASE_URL
+    
+    Returns:
+        True if the model was loaded
+    """
+    try:
+        response = _SESSION.post(
+            f"{base_url or OLLAMA_BASE_URL}/api/generate",
+            json={"model": model_name, "keep_alive": keep_alive},
+            timeout=300
+        )
+        response.raise_for_status()
+        return True
+    except requests.RequestException as e:
+        logger.warning("Failed to preload model %s: %s", model_name, e)
         return False
 
 def detect_available_llms() -> Dict[str, Any]:
-    """Detect which LLMs are available"""
+    """Detect which LLMs are available (the Ollama model list is cached once fetched)"""
     available = {
         "ollama": [],
         "openai": False,
@@ -207,7 +347,7 @@ def select_best_model(available_llms: Dict, system_capacity: Dict, prefer_local:
         
         # Fallback to any available tool-capable model
         for model in available_llms["ollama"]:
-            if any(model.startswith(m.split(":")[0]) for m in TOOL_CAPABLE_MODELS["ollama"]):
+            if check_tool_support("ollama", model):
                 return "ollama", model
         
         # Use first available model
@@ -232,23 +372,27 @@ def select_best_model(available_llms: Dict, system_capacity: Dict, prefer_local:
     return None, None
 
 def can_connect_ollama() -> bool:
-    """Check if Ollama is accessible"""
-    try:
-        ollama_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-        response = requests.get(f"{ollama_url}/api/tags", timeout=2)
-        return response.status_code == 200
-    except:
-        return False
+    """Check if Ollama is accessible (a successful probe is cached per process)"""
+    return _fetch_ollama_tags() is not None
 
+@functools.lru_cache(maxsize=1)
 def get_llm_config() -> Dict[str, Any]:
     """
     Get complete LLM configuration including auto-detection
     
+    The result is cached for the lifetime of the process; call
+    get_llm_config.cache_clear() to force a fresh detection.
+    
     Returns:
         Dictionary with provider, model, and configuration details
     """
-    system_capacity = detect_system_capacity()
-    available_llms = detect_available_llms()
+    # Hardware probing (subprocesses) and the Ollama HTTP probe are independent,
+    # so run them concurrently and wait for the slower one
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        capacity_future = executor.submit(detect_system_capacity)
+        available_future = executor.submit(detect_available_llms)
+        system_capacity = capacity_future.result()
+        available_llms = available_future.result()
     prefer_local = os.getenv("PREFER_LOCAL_LLM", "false").lower() == "true"
     
     provider, model = select_best_model(available_llms, system_capacity, prefer_local)
@@ -266,10 +410,4 @@ def get_llm_config() -> Dict[str, Any]:
 
 def check_tool_support(provider: str, model_name: str) -> bool:
     """Check if a model supports tool calling"""
-    if provider in TOOL_CAPABLE_MODELS:
-        if provider == "ollama":
-            return any(model_name.startswith(m.split(":")[0]) for m in TOOL_CAPABLE_MODELS[provider])
-        else:
-            # External APIs generally support tools
-            return any(model_name.startswith(m.split("-")[0]) for m in TOOL_CAPABLE_MODELS.get(provider, []))
-    return False
\ No newline at end of file
+    return _model_family(model_name) in _TOOL_CAPABLE_FAMILIES.get(provider, ())
\ No newline at end of file
@@ -3,13 +3,71 @@ LLM Factory Module
 Creates appropriate LLM instances based on provider configuration
 """
 
+import atexit
+import functools
 import os
 from typing import Any, Optional
 
+# Keep-alive pool settings shared by every provider HTTP client, so repeated
+# LLM round-trips reuse open connections instead of paying a new handshake
+HTTP_POOL_LIMITS = {
+    "max_keepalive_connections": 40,
+    "max_connections": 100,
+    "keepalive_expiry": 30.0,
+}
+HTTP_TIMEOUT = 300.0
+HTTP_CONNECT_TIMEOUT = 10.0
+
+# Maximum number of texts sent to Ollama's /api/embed in one request
+EMBED_BATCH_SIZE = 64
+
+# Maximum number of prompts sent together in one length-binned batch
+PROMPT_BIN_SIZE = 4
+
+@functools.lru_cache(maxsize=1)
+def get_http_client():
+    """
+    Get the process-wide pooled httpx client used by API-based providers
+    
+    Returns:
+        httpx.Client instance, closed automatically at interpreter exit
+    """
+    import httpx
+    
+    client = httpx.Client(
+        limits=httpx.Limits(**HTTP_POOL_LIMITS),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    )
+    atexit.register(client.close)
+    return client
+
+@functools.lru_cache(maxsize=1)
+def get_async_http_client():
+    """
+    Get the process-wide pooled httpx async client used by API-based providers
+    
+    Async connections belong to the event loop that opened them, so this client
+    is meant for one long-lived loop (such as the web app's); close it with
+    aclose() before that loop ends.
+    
+    Returns:
+        httpx.AsyncClient instance with the same pool limits as get_http_client()
+    """
+    import httpx
+    
+    return httpx.AsyncClient(
+        limits=httpx.Limits(**HTTP_POOL_LIMITS),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    )
+
 def get_llm_instance(provider: str, model_name: str, **kwargs):
     """
     Get LLM instance based on provider and model
     
+    Instances are cached per (provider, model_name, kwargs), so repeated
+    graph builds share one client and its connection pool. Calls with
+    unhashable kwargs bypass the cache.
+    
     Args:
         provider: LLM provider (ollama, openai, anthropic, azure_openai)
         model_name: Model name
@@ -18,10 +76,26 @@ def get_llm_instance(provider: str, model_name: str, **kwargs):
     Returns:
         LLM instance
     """
+    try:
+        kwargs_key = tuple(sorted(kwargs.items()))
+        hash(kwargs_key)
+    except TypeError:
+        return _create_llm_instance(provider, model_name, **kwargs)
+    
+    return _get_cached_llm_instance(provider, model_name, kwargs_key)
+
+@functools.lru_cache(maxsize=8)
+def _get_cached_llm_instance(provider: str, model_name: str, kwargs_key: tuple):
+    """Create an LLM instance once per hashable configuration"""
+    return _create_llm_instance(provider, model_name, **dict(kwargs_key))
+
+def _create_llm_instance(provider: str, model_name: str, **kwargs):
+    """Construct a new LLM instance for the given provider"""
     
     temperature = kwargs.get("temperature", 0)
     
     if provider == "ollama":
+        import httpx
         from langchain_ollama import ChatOllama
         base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
         
@@ -29,12 +103,18 @@ def get_llm_instance(provider: str, model_name: str, **kwargs):
         if os.getenv("IN_DOCKER") == "true":
             # If running in Docker, use the Ollama container name
             base_url = os.getenv("OLLAMA_CONTAINER_URL", "http://ollama:11434")
+        base_url = kwargs.get("base_url") or base_url
+        
+        # The Ollama client owns its httpx pool; configure it for keep-alive
+        client_kwargs = {"limits": httpx.Limits(**HTTP_POOL_LIMITS)}
+        client_kwargs.update(kwargs.get("client_kwargs") or {})
         
         return ChatOllama(
             base_url=base_url,
             model=model_name,
             temperature=temperature,
-            **{k: v for k, v in kwargs.items() if k != "temperature"}
+            client_kwargs=client_kwargs,
+            **{k: v for k, v in kwargs.items() if k not in ["temperature", "client_kwargs", "base_url"]}
         )
     
     elif provider == "openai":
@@ -48,7 +128,10 @@ def get_llm_instance(provider: str, model_name: str, **kwargs):
             model=model_name,
             temperature=temperature,
             api_key=api_key,
-            **{k: v for k, v in kwargs.items() if k not in ["temperature", "api_key"]}
+            http_client=kwargs.get("http_client") or get_http_client(),
+            http_async_client=kwargs.get("http_async_client") or get_async_http_client(),
+            **{k: v for k, v in kwargs.items()
+               if k not in ["temperature", "api_key", "http_client", "http_async_client"]}
         )
     
     elif provider == "anthropic":
@@ -82,12 +165,47 @@ def get_llm_instance(provider: str, model_name: str, **kwargs):
             api_version=api_version,
             api_key=api_key,
             temperature=temperature,
-            **{k: v for k, v in kwargs.items() if k not in ["temperature", "api_key"]}
+            http_client=kwargs.get("http_client") or get_http_client(),
+            http_async_client=kwargs.get("http_async_client") or get_async_http_client(),
+            **{k: v for k, v in kwargs.items()
+               if k not in ["temperature", "api_key", "http_client", "http_async_client"]}
         )
     
     else:
         raise ValueError(f"Unknown provider: {provider}")
 
+@functools.lru_cache(maxsize=1)
+def _get_batched_ollama_embeddings_class():
+    """Define BatchedOllamaEmbeddings on first use so the SDK import stays lazy"""
+    from langchain_ollama import OllamaEmbeddings
+    
+    class BatchedOllamaEmbeddings(OllamaEmbeddings):
+        """OllamaEmbeddings that sends documents to /api/embed in bounded batches
+        
+        Each batch goes through the SDK client, so client_kwargs (headers, auth),
+        keep_alive and model options apply as usual.
+        """
+        
+        batch_size: int = EMBED_BATCH_SIZE
+        
+        def _batches(self, texts):
+            for start in range(0, len(texts), self.batch_size):
+                yield texts[start:start + self.batch_size]
+        
+        def embed_documents(self, texts):
+            embeddings = []
+            for batch in self._batches(texts):
+                embeddings.extend(super().embed_documents(batch))
+            return embeddings
+        
+        async def aembed_documents(self, texts):
+            embeddings = []
+            for batch in self._batches(texts):
+                embeddings.extend(await super().aembed_documents(batch))
+            return embeddings
+    
+    return BatchedOllamaEmbeddings
+
 def get_embeddings_instance(provider: str, model_name: Optional[str] = None):
     """
     Get embeddings instance based on provider
@@ -101,7 +219,7 @@ def get_embeddings_instance(provider: str, model_name: Optional[str] = None):
     """
     
     if provider == "ollama":
-        from langchain_ollama import OllamaEmbeddings
+        BatchedOllamaEmbeddings = _get_batched_ollama_embeddings_class()
         base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
         
         if os.getenv("IN_DOCKER") == "true":
@@ -110,7 +228,7 @@ def get_embeddings_instance(provider: str, model_name: Optional[str] = None):
         # Use a smaller model for embeddings
         embed_model = model_name or "nomic-embed-text"
         
-        return OllamaEmbeddings(
+        return BatchedOllamaEmbeddings(
             base_url=base_url,
             model=embed_model
         )
@@ -161,4 +279,49 @@ def get_embeddings_instance(provider: str, model_name: Optional[str] = None):
         from langchain_community.embeddings import HuggingFaceEmbeddings
         return HuggingFaceEmbeddings(
             model_name=model_name or "sentence-transformers/all-MiniLM-L6-v2"
-        )
\ No newline at end of file
+        )
+
+def _approx_tokens(prompt) -> int:
+    """Cheap token estimate (~4 characters per token) for a string or message list"""
+    if isinstance(prompt, str):
+        return len(prompt) // 4
+    return sum(len(getattr(m, "content", m) or "") for m in prompt) // 4
+
+def bin_prompts(prompts: list, bin_size: int = PROMPT_BIN_SIZE, count_tokens=None) -> list:
+    """
+    Group prompts of similar length into batches
+    
+    A batch decodes until its longest sequence finishes, so mixing short and
+    long prompts leaves slots idle. Prompts are sorted by estimated length and
+    split into consecutive bins of at most bin_size.
+    
+    Args:
+        prompts: Prompts as strings or message lists
+        bin_size: Maximum number of prompts per bin
+        count_tokens: Optional token counter, e.g. model.get_num_tokens; defaults to a length heuristic
+    
+    Returns:
+        List of bins, each a list of indices into prompts
+    """
+    count_tokens = count_tokens or _approx_tokens
+    order = sorted(range(len(prompts)), key=lambda i: count_tokens(prompts[i]))
+    return [order[start:start + bin_size] for start in range(0, len(order), bin_size)]
+
+def batch_by_length(model, prompts: list, bin_size: int = PROMPT_BIN_SIZE, **batch_kwargs) -> list:
+    """
+    Run model.batch over length-binned groups of prompts
+    
+    Args:
+        model: LangChain chat model or runnable
+        prompts: Prompts as strings or message lists
+        bin_size: Maximum number of prompts per batch
+        **batch_kwargs: Passed through to model.batch (e.g. config, return_exceptions)
+    
+    Returns:
+        Responses in the same order as prompts
+    """
+    responses = [None] * len(prompts)
+    for indices in bin_prompts(prompts, bin_size):
+        for i, response in zip(indices, model.batch([prompts[i] for i in indices], **batch_kwargs)):
+            responses[i] = response
+    return responses
@@ -1,21 +1,176 @@
 #!/usr/bin/env python3
 """
 Build a portable agent package for deployment
-Creates a minimal zip file with only required runtime files
+Creates a minimal zip (or PACKAGE_FORMAT=tar.zst) archive with only required runtime files
 """
 
 import os
+import zlib
+import re
 import zipfile
+import tarfile
 import shutil
-from pathlib import Path
+import queue
+import threading
 from datetime import datetime
 
-def build_agent_package():
-    """Build portable agent zip package"""
+# Level 6 is zlib's default trade-off; level 9 costs about twice the CPU for ~2% size
+COMPRESS_LEVEL = 6
+
+# zstd level for PACKAGE_FORMAT=tar.zst; smaller and faster than deflate at this level
+ZSTD_LEVEL = 10
+
+# Compression threads (zlib releases the GIL) and the depth of the bounded
+# queues between the reader, compressor and writer stages
+DEFLATE_WORKERS = os.cpu_count() or 1
+PIPELINE_QUEUE_SIZE = 16
+
+# Buffer sizes for reading package inputs and writing the archive; large
+# buffers amortize read()/write() syscalls across the many small files
+READ_BUFFER_SIZE = 1 << 18
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Directory names never descended into while walking the package inputs
+EXCLUDE_DIRS = {"__pycache__", ".git", "venv", "env", "outputs", "container_outputs", "node_modules"}
+
+def _walk_files(descend):
+    """
+    Yield '/'-separated paths of files under the current directory using os.scandir
+    
+    DirEntry caches the file type from the directory read, so no extra stat
+    is needed per entry. Subdirectories named in EXCLUDE_DIRS, or whose
+    "path/" is rejected by descend, are never opened.
+    """
+    stack = [(".", "")]
+    while stack:
+        dir_path, prefix = stack.pop()
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                rel_path = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in EXCLUDE_DIRS and descend(rel_path + "/"):
+                        stack.append((entry.path, rel_path + "/"))
+                elif entry.is_file():
+                    yield rel_path
+
+def _deflate(data):
+    """Raw-deflate a file's contents (runs in a compressor thread)"""
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    return zlib.crc32(data), len(data), compressed
+
+def _write_deflated(zipf, path, arcname, crc, file_size, compressed):
+    """Append an already-deflated member to an open ZipFile
+    
+    zipfile has no public API for precompressed data, so this mirrors what
+    ZipFile.write does after compression: local header, payload, and the
+    bookkeeping needed for the central directory written on close.
+    """
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.file_size = file_size
+    zinfo.compress_size = len(compressed)
+    zinfo.CRC = crc
+    
+    zipf._writecheck(zinfo)
+    zipf._didModify = True
+    zinfo.header_offset = zipf.fp.tell()
+    zipf.fp.write(zinfo.FileHeader())
+    zipf.fp.write(compressed)
+    zipf.filelist.append(zinfo)
+    zipf.NameToInfo[zinfo.filename] = zinfo
+    zipf.start_dir = zipf.fp.tell()
+
+def _write_zip(package_name, files):
+    """Write files to a deflated zip through a read -> compress -> write pipeline
+    
+    A reader thread loads files into a bounded queue, DEFLATE_WORKERS threads
+    compress them, and the calling thread appends members to the zip in
+    their original order, so disk I/O overlaps with compression.
+    """
+    read_q = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    write_q = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    errors = []
+    
+    def reader():
+        try:
+            for index, path in enumerate(files):
+                with open(path, "rb", buffering=READ_BUFFER_SIZE) as f:
+                    read_q.put((index, path, f.read()))
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            for _ in range(DEFLATE_WORKERS):
+                read_q.put(None)
+    
+    def compressor():
+        try:
+            while (item := read_q.get()) is not None:
+                index, path, data = item
+                write_q.put((index, path, *_deflate(data)))
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            write_q.put(None)
+    
+    threads = [threading.Thread(target=reader, daemon=True)]
+    threads += [threading.Thread(target=compressor, daemon=True) for _ in range(DEFLATE_WORKERS)]
+    for thread in threads:
+        thread.start()
+    
+    with open(package_name, 'wb', buffering=WRITE_BUFFER_SIZE) as package_file, \
+         zipfile.ZipFile(package_file, 'w', zipfile.ZIP_DEFLATED, compresslevel=COMPRESS_LEVEL) as zipf:
+        # Members finish out of order; hold them until their turn comes up
+        pending = {}
+        next_index = 0
+        running = DEFLATE_WORKERS
+        while running:
+            item = write_q.get()
+            if item is None:
+                running -= 1
+                continue
+            pending[item[0]] = item[1:]
+            while next_index in pending:
+                path, crc, file_size, compressed = pending.pop(next_index)
+                _write_deflated(zipf, path, path, crc, file_size, compressed)
+                next_index += 1
+    
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+def _write_tar_zst(package_name, files):
+    """Write files to a zstd-compressed tarball using a multi-threaded encoder"""
+    try:
+        import zstandard
+    except ImportError:
+        raise SystemExit("PACKAGE_FORMAT=tar.zst requires the zstandard package: pip install zstandard")
+    
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+    with open(package_name, 'wb', buffering=WRITE_BUFFER_SIZE) as package_file, \
+         compressor.stream_writer(package_file) as writer, \
+         tarfile.open(fileobj=writer, mode="w|") as tar:
+        for path in files:
+            tar.add(path, arcname=path, recursive=False)
+
+# Archive writers and extraction commands by PACKAGE_FORMAT
+ARCHIVE_FORMATS = {
+    "zip": (_write_zip, "unzip"),
+    "tar.zst": (_write_tar_zst, "tar --zstd -xf"),
+}
+
+def build_agent_package(archive_format=None):
+    """Build portable agent package (zip by default, or tar.zst)"""
+    
+    archive_format = archive_format or os.getenv("PACKAGE_FORMAT", "zip")
+    if archive_format not in ARCHIVE_FORMATS:
+        raise SystemExit(f"Unknown PACKAGE_FORMAT: {archive_format} (use one of: {', '.join(ARCHIVE_FORMATS)})")
+    write_archive, extract_cmd = ARCHIVE_FORMATS[archive_format]
     
     # Define package name with timestamp
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    package_name = f"langgraph-agent-{timestamp}.zip"
+    package_name = f"langgraph-agent-{timestamp}.{archive_format}"
     
     # Files and directories to include
     include_patterns = [
@@ -37,7 +192,7 @@ def build_agent_package():
         "README_LLM.md",
         "README_WEBUI.md",
         
-        # Data directory structure (empty)
+        # Data directory
         "data/",
     ]
     
@@ -67,52 +222,42 @@ def build_agent_package():
         "CLAUDE.md",  # Exclude CLAUDE.md
     ]
     
+    # Compile all exclude patterns into one regex, applied to '/'-separated paths:
+    # "*.ext" matches a suffix, other globs and plain names match a whole path
+    # component (so "venv/" excludes anything under a venv directory)
+    regex_parts = []
+    for pattern in exclude_patterns:
+        if pattern.startswith("*."):
+            regex_parts.append(re.escape(pattern[1:]) + "$")
+        else:
+            component = re.escape(pattern.rstrip("/")).replace(r"\*", "[^/]*")
+            regex_parts.append(f"(?:^|/){component}(?:/|$)")
+    exclude_re = re.compile("|".join(regex_parts))
+    
     def should_include(path):
         """Check if file should be included"""
-        path_str = str(path)
-        
-        # Check excludes first
-        for pattern in exclude_patterns:
-            if pattern.endswith("/"):
-                if pattern in path_str:
-                    return False
-            elif pattern.startswith("*."):
-                if path_str.endswith(pattern[1:]):
-                    return False
-            elif pattern in path_str:
-                return False
-        
-        return True
+        return exclude_re.search(str(path).replace(os.sep, "/")) is None
     
     print(f"Building agent package: {package_name}")
     print("=" * 50)
     
-    included_files = []
-    
-    with zipfile.ZipFile(package_name, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for pattern in include_patterns:
-            if pattern.endswith("/"):
-                # Directory - walk through it
-                dir_path = Path(pattern)
-                if dir_path.exists():
-                    for file_path in dir_path.rglob("*"):
-                        if file_path.is_file() and should_include(file_path):
-                            arcname = str(file_path)
-                            zipf.write(file_path, arcname)
-                            included_files.append(arcname)
-                            print(f"  + {arcname}")
-                else:
-                    # Create empty directory in zip
-                    zipf.writestr(f"{pattern}", "")
-                    print(f"  + {pattern} (empty directory)")
-            else:
-                # Single file or glob pattern
-                path = Path(pattern)
-                if path.exists() and path.is_file():
-                    if should_include(path):
-                        zipf.write(path, str(path))
-                        included_files.append(str(path))
-                        print(f"  + {path}")
+    # One walk from the package root: files are matched by exact name or by
+    # include-directory prefix, and only directories on the way to an include
+    # directory are opened
+    include_files = {p for p in include_patterns if not p.endswith("/")}
+    include_dirs = tuple(p for p in include_patterns if p.endswith("/"))
+    
+    def descend(dir_path):
+        return dir_path.startswith(include_dirs) or any(d.startswith(dir_path) for d in include_dirs)
+    
+    included_files = sorted(
+        path for path in _walk_files(descend)
+        if (path in include_files or path.startswith(include_dirs)) and should_include(path)
+    )
+    for path in included_files:
+        print(f"  + {path}")
+    
+    write_archive(package_name, included_files)
     
     # Get package size
     package_size = os.path.getsize(package_name)
@@ -143,16 +288,16 @@ def build_agent_package():
     print("Deployment Instructions:")
     print("-" * 50)
     print("\nOption 1: Docker Compose (Recommended)")
-    print("1. Extract: unzip " + package_name)
+    print(f"1. Extract: {extract_cmd} {package_name}")
     print("2. Configure: cp .env.example .env && edit .env")
     print("3. Deploy: docker-compose up -d")
     print("4. Test: docker-compose exec agent python main.py test")
     print("\nOption 2: Standalone Docker")
-    print("1. Extract the zip file")
+    print("1. Extract the package")
     print("2. Build: docker build -t langgraph-agent .")
     print("3. Run: docker run --rm langgraph-agent")
     print("\nOption 3: Local Python")
-    print("1. Extract the zip file")
+    print("1. Extract the package")
     print("2. Install: pip install -r requirements.txt")
     print("3. Configure: cp .env.example .env && edit .env")
     print("4. Run: python main.py test")
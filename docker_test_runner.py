@@ -88,10 +88,13 @@ def run_container_tests():
             print(f"🎨 Visualization: {chart_result}")
             print(f"   ⏱️  Generation time: {viz_time:.3f}s")
             
-            # Verify file exists
+            # Verify file exists (a single stat gives existence and size)
             full_path = os.path.join(output_dir, test["output"])
-            if os.path.exists(full_path):
-                file_size = os.path.getsize(full_path) / 1024  # KB
+            try:
+                file_size = os.stat(full_path).st_size / 1024  # KB
+            except FileNotFoundError:
+                file_size = None
+            if file_size is not None:
                 print(f"   ✅ File created: {full_path} ({file_size:.1f} KB)")
                 results.append({
                     "test": test["name"],
@@ -137,12 +140,10 @@ def run_container_tests():
     # List all files in output directory
     print("\n📋 All files in output directory:")
     try:
-        files = os.listdir(output_dir)
-        for f in sorted(files):
-            if f.endswith('.png'):
-                path = os.path.join(output_dir, f)
-                size = os.path.getsize(path) / 1024
-                print(f"   - {f} ({size:.1f} KB)")
+        with os.scandir(output_dir) as entries:
+            pngs = sorted((e for e in entries if e.name.endswith('.png')), key=lambda e: e.name)
+        for e in pngs:
+            print(f"   - {e.name} ({e.stat().st_size / 1024:.1f} KB)")
     except Exception as e:
         print(f"   Error listing files: {e}")
     
@@ -12,9 +12,16 @@ import numpy as np
 from datetime import datetime, timedelta
 import os
 
-def generate_regular_sales_data():
-    # Set random seed for reproducibility
-    np.random.seed(42)
+# Calendar names indexed by dayofweek, month - 1 and quarter - 1
+DAY_NAMES = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])
+MONTH_NAMES = np.array(['January', 'February', 'March', 'April', 'May', 'June', 'July',
+                        'August', 'September', 'October', 'November', 'December'])
+QUARTER_NAMES = ['Q1', 'Q2', 'Q3', 'Q4']
+
+def _generate_regular_sales():
+    """Generate the regular sales frame along with its DatetimeIndex"""
+    # Seeded generator (PCG64) for reproducibility
+    rng = np.random.default_rng(42)
     
     # Generate date range for full year 2024 (sorted)
     start_date = datetime(2024, 1, 1)
@@ -23,69 +30,71 @@ def generate_regular_sales_data():
     
     # Base sales value
     base_sales = 1000
+    n = len(dates)
+    
+    # 1. Linear growth trend (20% annual growth, very smooth)
+    trend = base_sales + (200 * np.arange(n) / 365)  # Linear growth from 1000 to 1200
+    
+    # 2. Regular weekly pattern (very predictable), indexed by day of week
+    weekly_pattern = np.array([
+        1.0,   # Monday - normal
+        1.1,   # Tuesday - slightly higher
+        1.2,   # Wednesday - mid-week peak
+        1.15,  # Thursday - above average
+        1.05,  # Friday - slightly above normal
+        0.8,   # Saturday - weekend drop
+        0.7    # Sunday - lowest
+    ])
+    dow_factor = weekly_pattern[dates.dayofweek.values]
+    
+    # 3. Monthly seasonality (smooth sine wave)
+    # Peak in summer (June-July), low in winter (Jan-Feb)
+    day_of_year = dates.dayofyear.values
+    seasonal_factor = 1.0 + 0.2 * np.sin(2 * np.pi * day_of_year / 365 - np.pi/2)
+    
+    # 4. Very small random noise (±2% only)
+    noise = rng.normal(1.0, 0.02, size=n)
     
-    # Initialize sales array
-    sales = []
-    
-    for i, date in enumerate(dates):
-        # 1. Linear growth trend (20% annual growth, very smooth)
-        days_from_start = (date - start_date).days
-        trend = base_sales + (200 * days_from_start / 365)  # Linear growth from 1000 to 1200
-        
-        # 2. Regular weekly pattern (very predictable)
-        day_of_week = date.dayofweek
-        weekly_pattern = {
-            0: 1.0,   # Monday - normal
-            1: 1.1,   # Tuesday - slightly higher
-            2: 1.2,   # Wednesday - mid-week peak
-            3: 1.15,  # Thursday - above average
-            4: 1.05,  # Friday - slightly above normal
-            5: 0.8,   # Saturday - weekend drop
-            6: 0.7    # Sunday - lowest
-        }
-        dow_factor = weekly_pattern[day_of_week]
-        
-        # 3. Monthly seasonality (smooth sine wave)
-        # Peak in summer (June-July), low in winter (Jan-Feb)
-        day_of_year = date.timetuple().tm_yday
-        seasonal_factor = 1.0 + 0.2 * np.sin(2 * np.pi * day_of_year / 365 - np.pi/2)
-        
-        # 4. Very small random noise (±2% only)
-        noise = np.random.normal(1.0, 0.02)
-        
-        # Combine all factors
-        daily_sales = trend * dow_factor * seasonal_factor * noise
-        
-        # Round to nearest 10 for cleaner numbers
-        daily_sales = round(daily_sales / 10) * 10
-        
-        # Ensure non-negative
-        daily_sales = max(0, daily_sales)
-        
-        sales.append(daily_sales)
+    # Combine all factors
+    daily_sales = trend * dow_factor * seasonal_factor * noise
+    
+    # Round to nearest 10 for cleaner numbers and ensure non-negative
+    sales = np.maximum(0, np.round(daily_sales / 10) * 10).astype(int)
     
     # Create DataFrame (already sorted by date)
     df = pd.DataFrame({
-        'Date': dates.strftime('%Y-%m-%d'),
+        'Date': dates.values.astype('datetime64[D]').astype(str),
         'Value': sales
     })
     
+    return df, dates
+
+def generate_regular_sales_data():
+    df, _ = _generate_regular_sales()
     return df
 
 def generate_detailed_regular_data():
     """Generate version with additional metadata"""
-    df = generate_regular_sales_data()
+    df, dates = _generate_regular_sales()
     
-    # Add metadata columns
-    dates = pd.to_datetime(df['Date'])
-    df['Day_of_Week'] = dates.dt.strftime('%A')
-    df['Week_Number'] = dates.dt.isocalendar().week
-    df['Month'] = dates.dt.strftime('%B')
-    df['Quarter'] = ['Q' + str(d.quarter) for d in dates]
-    df['Is_Weekend'] = dates.dt.dayofweek.isin([5, 6])
+    # Add metadata columns from the original DatetimeIndex (no re-parsing of 'Date')
+    dow = dates.dayofweek.values
+    df['Day_of_Week'] = DAY_NAMES[dow]
+    df['Week_Number'] = dates.isocalendar().week.values
+    df['Month'] = MONTH_NAMES[dates.month.values - 1]
+    df['Quarter'] = pd.Categorical.from_codes(dates.quarter.values - 1, categories=QUARTER_NAMES)
+    df['Is_Weekend'] = dow >= 5
     
     return df
 
+# Output buffer for CSV files; each dataset is written with one write() call
+WRITE_BUFFER_SIZE = 1 << 18
+
+def _save_csv(df, path):
+    """Render a DataFrame to CSV in memory and write it out in a single call"""
+    with open(path, 'w', newline='', buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(df.to_csv(index=False))
+
 def save_regular_datasets():
     # Generate regular sales data
     df_simple = generate_regular_sales_data()
@@ -96,22 +105,23 @@ def save_regular_datasets():
     os.makedirs(output_dir, exist_ok=True)
     
     # Save simple version (Date, Value)
-    df_simple.to_csv(f'{output_dir}/regular_sales.csv', index=False)
+    _save_csv(df_simple, f'{output_dir}/regular_sales.csv')
     print(f"Saved regular dataset: {output_dir}/regular_sales.csv")
     
     # Save detailed version
-    df_detailed.to_csv(f'{output_dir}/regular_sales_detailed.csv', index=False)
+    _save_csv(df_detailed, f'{output_dir}/regular_sales_detailed.csv')
     print(f"Saved detailed dataset: {output_dir}/regular_sales_detailed.csv")
     
     # Print summary statistics
     print("\n=== Regular Dataset Summary ===")
     print(f"Date range: {df_simple['Date'].min()} to {df_simple['Date'].max()}")
     print(f"Total days: {len(df_simple)}")
-    print(f"Average daily sales: ${df_simple['Value'].mean():.2f}")
-    print(f"Min sales: ${df_simple['Value'].min()}")
-    print(f"Max sales: ${df_simple['Value'].max()}")
-    print(f"Standard deviation: ${df_simple['Value'].std():.2f}")
-    print(f"Total annual sales: ${df_simple['Value'].sum():,}")
+    stats = df_simple['Value'].agg(['mean', 'min', 'max', 'std', 'sum'])
+    print(f"Average daily sales: ${stats['mean']:.2f}")
+    print(f"Min sales: ${int(stats['min'])}")
+    print(f"Max sales: ${int(stats['max'])}")
+    print(f"Standard deviation: ${stats['std']:.2f}")
+    print(f"Total annual sales: ${int(stats['sum']):,}")
     
     # Show sample of data (first week)
     print("\n=== First Week (showing regular weekly pattern) ===")
@@ -1,11 +1,49 @@
 import os
 import sys
+import logging
+import functools
 import typer
 from typing import Optional
-from langchain_core.messages import HumanMessage
+
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+
+# Timeout (seconds) for the Ollama reachability probe
+OLLAMA_PROBE_TIMEOUT = 1
+
+# Maximum number of data file names listed by `test`
+DATA_LISTING_LIMIT = 10
 
 app = typer.Typer()
 
+# Heavy dependencies (requests, LangChain) are imported inside the commands
+# that use them so `sleep`, `test` and the help text start quickly
+
+@functools.lru_cache(maxsize=1)
+def _get_session():
+    """One pooled keep-alive connection shared by every Ollama probe"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+    return session
+
+@functools.lru_cache(maxsize=1)
+def _ollama_tags(base_url):
+    """Fetch the names of models served by Ollama, or None if it is unreachable"""
+    import requests
+    try:
+        response = _get_session().get(f"{base_url}/api/tags", timeout=OLLAMA_PROBE_TIMEOUT)
+        if response.status_code != 200:
+            return None
+        return [m['name'] for m in response.json().get('models', [])]
+    except (requests.exceptions.RequestException, ValueError):
+        return None
+
+def _check_ollama(base_url):
+    """Check whether Ollama is reachable (probed once per process)"""
+    return _ollama_tags(base_url) is not None
+
 @app.command()
 def run(prompt: str = "Analyze the sample data"):
     """Run the agent with a given prompt."""
@@ -14,16 +52,7 @@ def run(prompt: str = "Analyze the sample data"):
     model_name = os.getenv("LLM_MODEL", "llama3.2")
     
     # Test Ollama connection
-    import requests
-    try:
-        response = requests.get(f"{base_url}/api/tags", timeout=5)
-        if response.status_code != 200:
-            print(f"ERROR: Cannot connect to Ollama at {base_url}")
-            print("Please ensure Ollama is running locally.")
-            print("\nTo start Ollama: ollama serve")
-            print(f"To pull the model: ollama pull {model_name}")
-            sys.exit(1)
-    except requests.exceptions.RequestException:
+    if not _check_ollama(base_url):
         print(f"ERROR: Cannot connect to Ollama at {base_url}")
         print("Please ensure Ollama is running locally.")
         print("\nTo start Ollama: ollama serve")
@@ -32,6 +61,7 @@ def run(prompt: str = "Analyze the sample data"):
     
     try:
         from agents.graph_agent import build_graph
+        from langchain_core.messages import HumanMessage
         print(f"Starting agent with prompt: {prompt}")
         app_graph = build_graph()
         result = app_graph.invoke({"messages":[HumanMessage(content=prompt)]})
@@ -52,33 +82,49 @@ def chat():
     base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     model_name = os.getenv("LLM_MODEL", "llama3.2")
     
-    import requests
-    try:
-        response = requests.get(f"{base_url}/api/tags", timeout=5)
-        if response.status_code != 200:
-            print(f"ERROR: Cannot connect to Ollama at {base_url}")
-            sys.exit(1)
-    except requests.exceptions.RequestException:
+    if not _check_ollama(base_url):
         print(f"ERROR: Cannot connect to Ollama at {base_url}")
         sys.exit(1)
     
     try:
+        import asyncio
         from agents.graph_agent import build_graph
         print("Starting interactive chat mode. Type 'exit' to quit.")
         app_graph = build_graph()
         
-        while True:
-            prompt = input("\n> ")
-            if prompt.lower() in ['exit', 'quit']:
-                print("Goodbye!")
-                break
-            
-            result = app_graph.invoke({"messages":[HumanMessage(content=prompt)]})
-            print("\nAgent:", result)
+        # Input is read on the main thread so Ctrl+C at the prompt exits at once;
+        # one loop serves every turn so async clients keep their connections
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
+                prompt = input("\n> ")
+                if prompt.lower() in ['exit', 'quit']:
+                    print("Goodbye!")
+                    break
+                loop.run_until_complete(_stream_reply(app_graph, prompt))
+        except (KeyboardInterrupt, EOFError):
+            print("\nGoodbye!")
+        finally:
+            loop.close()
     except Exception as e:
         print(f"Error in chat mode: {e}")
         sys.exit(1)
 
+async def _stream_reply(app_graph, prompt: str):
+    """Print the agent's reply to one prompt token by token as it is generated"""
+    from langchain_core.messages import HumanMessage
+    
+    print("\nAgent: ", end="", flush=True)
+    events = app_graph.astream_events({"messages":[HumanMessage(content=prompt)]}, version="v2")
+    async for event in events:
+        if event["event"] == "on_chat_model_stream":
+            content = event["data"]["chunk"].content
+            if isinstance(content, str) and content:
+                print(content, end="", flush=True)
+        elif event["event"] == "on_tool_start":
+            print(f"\n[running {event['name']}]", flush=True)
+    print()
+
 @app.command()
 def sleep():
     """Keep the container running for interactive use."""
@@ -92,21 +138,31 @@ def sleep():
     print("\nPress Ctrl+C to stop the container.")
     print("=" * 50)
     
-    # Keep the container running
-    import time
+    # Keep the container running: sleep in the kernel until SIGTERM (docker stop)
+    # or Ctrl+C, both of which raise KeyboardInterrupt here
+    import signal
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
     try:
-        while True:
-            time.sleep(60)
+        if hasattr(signal, "pause"):
+            signal.pause()
+        else:
+            # Windows has no signal.pause; long sleeps still wake for Ctrl+C
+            import time
+            while True:
+                time.sleep(3600)
     except KeyboardInterrupt:
-        print("\nShutting down...")
-        sys.exit(0)
+        pass
+    print("\nShutting down...")
+    sys.exit(0)
 
 @app.command()
 def test():
     """Test if the agent is properly configured."""
-    print("=" * 50)
-    print("LangGraph Table Agent - Configuration Test")
-    print("=" * 50)
+    # Collect the report and write it in one call instead of a syscall per line
+    out = []
+    out.append("=" * 50)
+    out.append("LangGraph Table Agent - Configuration Test")
+    out.append("=" * 50)
     
     has_errors = False
     
@@ -114,76 +170,80 @@ def test():
     base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     model_name = os.getenv("LLM_MODEL", "qwen2.5:7b")
     
-    print(f"Configuration:")
-    print(f"  Ollama URL: {base_url}")
-    print(f"  Model: {model_name}")
+    out.append(f"Configuration:")
+    out.append(f"  Ollama URL: {base_url}")
+    out.append(f"  Model: {model_name}")
     
-    import requests
-    try:
-        response = requests.get(f"{base_url}/api/tags", timeout=5)
-        if response.status_code == 200:
-            print("✓ Ollama is running and accessible")
-            # Check if model is available
-            data = response.json()
-            models = [m['name'] for m in data.get('models', [])]
-            if any(model_name in m for m in models):
-                print(f"✓ Model {model_name} is available")
-            else:
-                print(f"⚠ Model {model_name} not found")
-                print(f"  Available models: {', '.join(models) if models else 'none'}")
-                print(f"  To pull model: ollama pull {model_name}")
-                has_errors = True
-            
-            # Show tool-capable models that are available
-            from agents.graph_agent import TOOL_CAPABLE_MODELS
-            available_tool_models = [m for m in models if any(m.startswith(tc.split(':')[0]) for tc in TOOL_CAPABLE_MODELS)]
-            if available_tool_models:
-                print(f"\n  Tool-capable models available:")
-                for m in available_tool_models:
-                    print(f"    - {m}")
-            else:
-                print(f"\n  No tool-capable models found. Recommended:")
-                print(f"    - qwen2.5:7b (default)")
-                print(f"    - llama3.1:8b")
-                print(f"    - llama3.2")
+    models = _ollama_tags(base_url)
+    if models is not None:
+        out.append("✓ Ollama is running and accessible")
+        # Check if model is available
+        if any(model_name in m for m in models):
+            out.append(f"✓ Model {model_name} is available")
         else:
-            print("⚠ Ollama is not responding correctly")
+            out.append(f"⚠ Model {model_name} not found")
+            out.append(f"  Available models: {', '.join(models) if models else 'none'}")
+            out.append(f"  To pull model: ollama pull {model_name}")
             has_errors = True
-    except requests.exceptions.RequestException as e:
-        print(f"⚠ Cannot connect to Ollama at {base_url}")
-        print("  Make sure Ollama is running: ollama serve")
+        
+        # Show tool-capable models that are available
+        from agents.llm_detector import check_tool_support
+        available_tool_models = [m for m in models if check_tool_support("ollama", m)]
+        if available_tool_models:
+            out.append(f"\n  Tool-capable models available:")
+            for m in available_tool_models:
+                out.append(f"    - {m}")
+        else:
+            out.append(f"\n  No tool-capable models found. Recommended:")
+            out.append(f"    - qwen2.5:7b (default)")
+            out.append(f"    - llama3.1:8b")
+            out.append(f"    - llama3.2")
+    else:
+        out.append(f"⚠ Cannot connect to Ollama at {base_url}")
+        out.append("  Make sure Ollama is running: ollama serve")
         has_errors = True
     
     # Check imports
     try:
         from agents.graph_agent import build_graph
-        print("✓ Agent modules can be imported")
+        out.append("✓ Agent modules can be imported")
     except ImportError as e:
-        print(f"✗ Import error: {e}")
+        out.append(f"✗ Import error: {e}")
         has_errors = True
     
     # Check data directory
     if os.path.exists("/app/data"):
-        print("✓ Data directory exists")
-        files = os.listdir("/app/data")
-        if files:
-            print(f"  Found {len(files)} file(s): {', '.join(files)}")
+        out.append("✓ Data directory exists")
+        # Count entries while keeping only the first few names for display
+        count = 0
+        names = []
+        with os.scandir("/app/data") as entries:
+            for entry in entries:
+                count += 1
+                if len(names) < DATA_LISTING_LIMIT:
+                    names.append(entry.name)
+        if count:
+            more = f", ... (+{count - len(names)} more)" if count > len(names) else ""
+            out.append(f"  Found {count} file(s): {', '.join(names)}{more}")
     else:
-        print("✓ Data directory created at /app/data")
+        out.append("✓ Data directory created at /app/data")
     
     # Check output directory
     if os.path.exists("/app/outputs"):
-        print("✓ Output directory exists")
+        out.append("✓ Output directory exists")
     else:
-        print("✓ Output directory created at /app/outputs")
+        out.append("✓ Output directory created at /app/outputs")
     
-    print("\n" + "=" * 50)
+    out.append("\n" + "=" * 50)
     if has_errors:
-        print("⚠ Configuration incomplete - see warnings above")
-        print("The agent needs Ollama running locally to function")
+        out.append("⚠ Configuration incomplete - see warnings above")
+        out.append("The agent needs Ollama running locally to function")
     else:
-        print("✅ Agent is fully configured and ready to run!")
-    print("=" * 50)
+        out.append("✅ Agent is fully configured and ready to run!")
+    out.append("=" * 50)
+    
+    sys.stdout.write("\n".join(out) + "\n")
+    sys.stdout.flush()
     
     # Don't exit with error code even if config is incomplete
     # This allows the container to stay running
@@ -192,16 +252,19 @@ def test():
 if __name__ == "__main__":
     # If no arguments provided, show help
     if len(sys.argv) == 1:
-        print("LangGraph Table Agent")
-        print("=====================")
-        print("\nAvailable commands:")
-        print("  run <prompt>  - Run agent with a specific prompt")
-        print("  chat          - Start interactive chat mode")
-        print("  test          - Test agent configuration")
-        print("  sleep         - Keep container running for interactive use")
-        print("\nExample: python main.py run 'Analyze the sales data'")
-        print("\nFor interactive use in container:")
-        print("  docker exec -it <container> python main.py chat")
+        sys.stdout.write("\n".join([
+            "LangGraph Table Agent",
+            "=====================",
+            "\nAvailable commands:",
+            "  run <prompt>  - Run agent with a specific prompt",
+            "  chat          - Start interactive chat mode",
+            "  test          - Test agent configuration",
+            "  sleep         - Keep container running for interactive use",
+            "\nExample: python main.py run 'Analyze the sales data'",
+            "\nFor interactive use in container:",
+            "  docker exec -it <container> python main.py chat",
+        ]) + "\n")
+        sys.stdout.flush()
         sys.exit(0)
     
     app()
@@ -1,18 +1,15 @@
 #!/usr/bin/env python3
 import os
-from langchain_ollama import ChatOllama
 from langchain_core.messages import HumanMessage, SystemMessage
 from tools.data_tools import profile_table, plot_chart
+from _shared_model import get_model
 
 # Setup
 base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 model_name = os.getenv("LLM_MODEL", "llama3.2")
 
-model = ChatOllama(
-    base_url=base_url,
-    model=model_name,
-    temperature=0
-)
+# Shared resident model (see _shared_model.py)
+model = get_model(model_name)
 
 print("Testing agent with manual tool execution...")
 
@@ -1,18 +1,16 @@
 #!/usr/bin/env python3
 import os
-from langchain_ollama import ChatOllama
+import asyncio
 from langchain_core.messages import HumanMessage, SystemMessage
 from tools.data_tools import profile_table, plot_chart
+from _shared_model import get_model
 
 # Setup
 base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 model_name = "qwen2.5:7b"
 
-model = ChatOllama(
-    base_url=base_url,
-    model=model_name,
-    temperature=0
-)
+# Shared resident model (see _shared_model.py)
+model = get_model(model_name)
 
 print(f"Testing {model_name} with realistic business sales data...")
 print("=" * 60)
@@ -33,35 +31,44 @@ messages = [
     HumanMessage(content=user_prompt)
 ]
 
-# Get model response
+async def _run():
+    # The tool inputs don't depend on the model's answer, so start generation
+    # first and run the (concurrent) tool calls while the model is decoding
+    llm_task = asyncio.create_task(model.ainvoke(messages))
+    tool_results = await asyncio.gather(
+        profile_table.ainvoke({"file": "data/business_sales.csv"}),
+        plot_chart.ainvoke({
+            "file": "data/business_sales.csv", 
+            "x": "Date", 
+            "y": "Value",
+            "out": "qwen_business_analysis.png"
+        }),
+        profile_table.ainvoke({"file": "data/business_sales_detailed.csv"}),
+    )
+    return await llm_task, tool_results
+
 print(f"\nUser: {user_prompt}")
 print("\n" + "=" * 60)
-response = model.invoke(messages)
+response, (profile_result, chart_result, detailed_profile) = asyncio.run(_run())
+
+# Model response
 print(f"\nAssistant Analysis:\n{response.content}")
 
-# Execute tools
+# Tool results
 print("\n" + "=" * 60)
 print("\n📊 Executing Data Analysis Tools...")
 print("-" * 40)
 
 # Profile the data
 print("\n1. Statistical Profile of Business Sales:")
-profile_result = profile_table.invoke({"file": "data/business_sales.csv"})
 print(profile_result)
 
 # Create visualization
 print("\n2. Creating Sales Trend Visualization:")
-chart_result = plot_chart.invoke({
-    "file": "data/business_sales.csv", 
-    "x": "Date", 
-    "y": "Value",
-    "out": "qwen_business_analysis.png"
-})
 print(chart_result)
 
 # Analyze detailed data
 print("\n3. Analyzing Detailed Business Data:")
-detailed_profile = profile_table.invoke({"file": "data/business_sales_detailed.csv"})
 print(detailed_profile)
 
 print("\n" + "=" * 60)
@@ -4,9 +4,11 @@ Comprehensive test of qwen2.5:7b model with data analysis
 """
 import os
 import sys
-from langchain_ollama import ChatOllama
+import asyncio
 from langchain_core.messages import HumanMessage, SystemMessage
 from tools.data_tools import profile_table, plot_chart
+from agents.llm_factory import batch_by_length
+from _shared_model import get_model
 
 def test_qwen_model():
     # Configuration
@@ -18,98 +20,105 @@ def test_qwen_model():
     print(f"  COMPREHENSIVE TEST: {model_name}")
     print("=" * 70)
     
-    # Initialize model
-    model = ChatOllama(
-        base_url=base_url,
-        model=model_name,
-        temperature=0
+    # Initialize model (shared and already resident, see _shared_model.py)
+    model = get_model(model_name)
+    
+    system_prompt = """You are a data analyst. You have CSV files available:
+    - regular_sales.csv: Daily sales data with Date and Value columns
+    - business_sales.csv: Business sales data with patterns
+    Describe how you would analyze these files."""
+    
+    complex_prompt = """Based on the following sales statistics:
+    - Average: $1,100/day
+    - Peak day: Wednesday ($1,316)
+    - Lowest day: Sunday ($773)
+    - Annual growth: 20%
+    
+    What business recommendations would you make?"""
+    
+    # The LLM prompts of tests 1, 2 and 5 don't depend on each other, so send
+    # them as one batch; Ollama decodes concurrent requests together
+    # (up to OLLAMA_NUM_PARALLEL) instead of one after another. All three start
+    # with the same system message so the server can reuse its cached prompt
+    # prefix instead of prefilling it per request (Ollama has no n > 1 drafts).
+    # Prompts are grouped by length so short ones don't wait on long ones
+    system_message = SystemMessage(content=system_prompt)
+    prompts = [
+        [system_message, HumanMessage(content="Say 'OK' if you're working")],
+        [system_message, HumanMessage(content="What analysis would you perform on the regular_sales.csv file?")],
+        [system_message, HumanMessage(content=complex_prompt)],
+    ]
+    connectivity, analysis, reasoning = batch_by_length(
+        model, prompts, config={"max_concurrency": 4}, return_exceptions=True
     )
     
     # Test 1: Basic connectivity
     print("\n📡 TEST 1: Model Connectivity")
     print("-" * 40)
-    try:
-        response = model.invoke([HumanMessage(content="Say 'OK' if you're working")])
-        print(f"✅ Model responded: {response.content[:100]}")
-    except Exception as e:
-        print(f"❌ Model connection failed: {e}")
+    if isinstance(connectivity, Exception):
+        print(f"❌ Model connection failed: {connectivity}")
         return False
+    print(f"✅ Model responded: {connectivity.content[:100]}")
     
     # Test 2: Data analysis understanding
     print("\n📊 TEST 2: Data Analysis Understanding")
     print("-" * 40)
     
-    system_prompt = """You are a data analyst. You have CSV files available:
-    - regular_sales.csv: Daily sales data with Date and Value columns
-    - business_sales.csv: Business sales data with patterns
-    Describe how you would analyze these files."""
-    
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content="What analysis would you perform on the regular_sales.csv file?")
-    ]
-    
-    try:
-        response = model.invoke(messages)
-        print("Model's analysis approach:")
-        print(response.content[:500] + "...")
-    except Exception as e:
-        print(f"❌ Analysis understanding failed: {e}")
+    if isinstance(analysis, Exception):
+        print(f"❌ Analysis understanding failed: {analysis}")
         return False
+    print("Model's analysis approach:")
+    print(analysis.content[:500] + "...")
+    
+    # Tests 3 and 4 use independent tools, so run them concurrently
+    async def run_tools():
+        return await asyncio.gather(
+            profile_table.ainvoke({"file": "data/regular_sales.csv"}),
+            plot_chart.ainvoke({
+                "file": "data/regular_sales.csv",
+                "x": "Date",
+                "y": "Value",
+                "out": "qwen_test_comprehensive.png"
+            }),
+            return_exceptions=True
+        )
+    
+    profile_result, chart_result = asyncio.run(run_tools())
     
     # Test 3: Tool execution - Profile Data
     print("\n🔧 TEST 3: Data Profiling Tool")
     print("-" * 40)
     
-    try:
-        # Test with regular sales data
-        print("Profiling regular_sales.csv:")
-        result = profile_table.invoke({"file": "data/regular_sales.csv"})
-        stats = result.split('\\n')[:8]  # First 8 lines
-        for line in stats:
-            print(f"  {line}")
-        print("✅ Profiling successful")
-    except Exception as e:
-        print(f"❌ Profiling failed: {e}")
+    # Test with regular sales data
+    print("Profiling regular_sales.csv:")
+    if isinstance(profile_result, Exception):
+        print(f"❌ Profiling failed: {profile_result}")
         return False
+    stats = profile_result.split('\\n')[:8]  # First 8 lines
+    for line in stats:
+        print(f"  {line}")
+    print("✅ Profiling successful")
     
     # Test 4: Tool execution - Create Chart
     print("\n📈 TEST 4: Visualization Tool")
     print("-" * 40)
     
-    try:
-        print("Creating chart from regular_sales.csv...")
-        result = plot_chart.invoke({
-            "file": "data/regular_sales.csv",
-            "x": "Date",
-            "y": "Value",
-            "out": "qwen_test_comprehensive.png"
-        })
-        print(f"✅ {result}")
-    except Exception as e:
-        print(f"❌ Visualization failed: {e}")
+    print("Creating chart from regular_sales.csv...")
+    if isinstance(chart_result, Exception):
+        print(f"❌ Visualization failed: {chart_result}")
         return False
+    print(f"✅ {chart_result}")
     
     # Test 5: Complex reasoning
     print("\n🧠 TEST 5: Complex Business Reasoning")
     print("-" * 40)
     
-    complex_prompt = """Based on the following sales statistics:
-    - Average: $1,100/day
-    - Peak day: Wednesday ($1,316)
-    - Lowest day: Sunday ($773)
-    - Annual growth: 20%
-    
-    What business recommendations would you make?"""
-    
-    try:
-        response = model.invoke([HumanMessage(content=complex_prompt)])
-        print("Model's recommendations:")
-        print(response.content[:500] + "...")
-        print("✅ Complex reasoning successful")
-    except Exception as e:
-        print(f"❌ Complex reasoning failed: {e}")
+    if isinstance(reasoning, Exception):
+        print(f"❌ Complex reasoning failed: {reasoning}")
         return False
+    print("Model's recommendations:")
+    print(reasoning.content[:500] + "...")
+    print("✅ Complex reasoning successful")
     
     # Summary
     print("\n" + "=" * 70)
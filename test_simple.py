@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import os
-from langchain_ollama import ChatOllama
 from langchain_core.messages import HumanMessage
+from _shared_model import get_model
 
 # Test basic connection
 base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
@@ -9,11 +9,8 @@ model_name = os.getenv("LLM_MODEL", "llama3.2")
 
 print(f"Testing connection to {base_url} with model {model_name}")
 
-model = ChatOllama(
-    base_url=base_url,
-    model=model_name,
-    temperature=0
-)
+# Shared resident model (see _shared_model.py)
+model = get_model(model_name)
 
 # Test simple message
 response = model.invoke([HumanMessage(content="Say hello")])
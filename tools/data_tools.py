@@ -1,14 +1,215 @@
 from langchain_core.tools import tool
-import os, pandas as pd, numpy as np, matplotlib.pyplot as plt
+import os, re, threading, pandas as pd, numpy as np
+from collections import OrderedDict
+
+# Optional: PyArrow parses CSVs on multiple threads into Arrow-backed columns
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = pacsv = None
+
+# One Figure is reused for every chart, so concurrent tool calls must not interleave
+_PLOT_LOCK = threading.Lock()
+_FIGURE = None
+
+
+def _get_axes():
+    """Return the shared Figure and its cleared Axes (call with _PLOT_LOCK held).
+
+    matplotlib is imported here, on the first chart, so importing the tools
+    (e.g. for `main.py test` or profiling) does not pay for it.
+    """
+    global _FIGURE
+    if _FIGURE is None:
+        import matplotlib
+        matplotlib.use("Agg")  # headless rendering; never initialize a GUI toolkit
+        from matplotlib.figure import Figure
+        _FIGURE = Figure(figsize=(8, 5))
+        _FIGURE.add_subplot()
+    ax = _FIGURE.axes[0]
+    ax.cla()
+    return _FIGURE, ax
+
+
+# Series longer than this are downsampled with LTTB before plotting
+PLOT_MAX_POINTS = 2000
+
+# Chart PNGs are throwaway previews: lower resolution and fast zlib settings
+# instead of Pillow's extra optimize pass
+PLOT_DPI = 80
+PLOT_PNG_KWARGS = {"optimize": False, "compress_level": 1}
+
+
+def _lttb(xs: np.ndarray, ys: np.ndarray, n_out: int) -> np.ndarray:
+    """Return the indices of a Largest-Triangle-Three-Buckets downsample of (xs, ys).
+
+    The first and last points are always kept; every bucket in between keeps
+    the point forming the largest triangle with the previously kept point and
+    the mean of the next bucket.
+    """
+    n = len(xs)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    csx = np.concatenate(([0.0], np.cumsum(xs)))
+    csy = np.concatenate(([0.0], np.cumsum(ys)))
+    counts = np.diff(edges)
+    next_x = np.append(((csx[edges[1:]] - csx[edges[:-1]]) / counts)[1:], xs[-1])
+    next_y = np.append(((csy[edges[1:]] - csy[edges[:-1]]) / counts)[1:], ys[-1])
+    
+    idx = np.empty(n_out, dtype=np.intp)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((xs[a] - next_x[i]) * (ys[lo:hi] - ys[a])
+                      - (xs[a] - xs[lo:hi]) * (next_y[i] - ys[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def _to_plot_array(col: pd.Series) -> np.ndarray:
+    """Convert a column to a plain NumPy array matplotlib can consume without per-element conversion."""
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col.to_numpy(dtype="datetime64[ns]")
+    if pd.api.types.is_numeric_dtype(col):
+        return col.to_numpy(dtype=float, na_value=np.nan)
+    return col.to_numpy()
+
+
+def _downsample(xs: np.ndarray, ys: np.ndarray):
+    """Reduce a numeric y series to PLOT_MAX_POINTS points, preserving its shape."""
+    if len(ys) <= PLOT_MAX_POINTS or ys.dtype.kind != "f":
+        return xs, ys
+    if xs.dtype.kind == "M":
+        x_pos = xs.astype(np.int64).astype(float)
+    elif xs.dtype.kind == "f":
+        x_pos = xs
+    else:
+        # Categorical or string x: points are evenly spaced by position
+        x_pos = np.arange(len(xs), dtype=float)
+    idx = _lttb(x_pos, ys, PLOT_MAX_POINTS)
+    return xs[idx], ys[idx]
+
+
+# Output directories already created by this process
+_READY_OUTPUT_DIRS = set()
 
 
 def _ensure_outputs_path(out: str, fallback: str) -> str:
     """Ensure the OUTPUT_DIR exists and return a valid path for saving files."""
     output_dir = os.getenv("OUTPUT_DIR", "/app/outputs")
-    os.makedirs(output_dir, exist_ok=True)
+    if output_dir not in _READY_OUTPUT_DIRS:
+        os.makedirs(output_dir, exist_ok=True)
+        _READY_OUTPUT_DIRS.add(output_dir)
     return os.path.join(output_dir, out or fallback)
 
 
+# Parsed CSVs keyed on (abspath, st_mtime_ns, st_size), least recently used first
+_CSV_CACHE_SIZE = 16
+_CSV_CACHE = OrderedDict()
+_CSV_CACHE_LOCK = threading.Lock()
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    """Parse a CSV with PyArrow when available, otherwise (or on failure) with pandas."""
+    if pacsv is not None:
+        try:
+            table = pacsv.read_csv(path, read_options=pacsv.ReadOptions(use_threads=True))
+            return table.to_pandas(types_mapper=pd.ArrowDtype)
+        except pa.ArrowException:
+            pass
+    return pd.read_csv(path)
+
+
+def _load_csv_keyed(file: str):
+    """Return (cache key, DataFrame) for a CSV, parsing it only when the file changed."""
+    path = os.path.abspath(file)
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    with _CSV_CACHE_LOCK:
+        df = _CSV_CACHE.get(key)
+        if df is not None:
+            _CSV_CACHE.move_to_end(key)
+            return key, df
+    
+    df = _read_csv(path)
+    with _CSV_CACHE_LOCK:
+        _CSV_CACHE[key] = df
+        _CSV_CACHE.move_to_end(key)
+        while len(_CSV_CACHE) > _CSV_CACHE_SIZE:
+            _CSV_CACHE.popitem(last=False)
+    return key, df
+
+
+def _load_csv(file: str) -> pd.DataFrame:
+    """Parse a CSV once and reuse it across tool calls until the file changes.
+
+    The returned DataFrame is shared, so callers must not modify it.
+    """
+    return _load_csv_keyed(file)[1]
+
+
+# CSVs larger than this are profiled chunk by chunk instead of being loaded whole
+PROFILE_STREAM_BYTES = 256 * 1024 * 1024
+PROFILE_CHUNK_ROWS = 1_000_000
+
+
+def _streaming_profile(path: str):
+    """Profile a CSV in O(chunk) memory, or return None if it has no rows.
+
+    Numeric columns get count/mean/std/min/max, with per-chunk moments merged
+    using Chan's parallel variance update; other columns get a non-null count
+    (unique/top would need memory proportional to the distinct values).
+    """
+    columns = numeric = None
+    rows = 0
+    for chunk in pd.read_csv(path, chunksize=PROFILE_CHUNK_ROWS):
+        if columns is None:
+            columns = chunk.columns
+            numeric = chunk.select_dtypes("number").columns
+            k = len(numeric)
+            n, mean, m2 = np.zeros(k), np.zeros(k), np.zeros(k)
+            lo, hi = np.full(k, np.inf), np.full(k, -np.inf)
+            counts = pd.Series(0, index=columns)
+        rows += len(chunk)
+        counts += chunk.count()
+        
+        values = chunk[numeric].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        c_n = np.count_nonzero(~np.isnan(values), axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            c_mean = np.nansum(values, axis=0) / c_n
+            c_m2 = np.nansum((values - c_mean) ** 2, axis=0)
+            total = n + c_n
+            delta = c_mean - mean
+            has = c_n > 0
+            mean = np.where(has, mean + delta * c_n / total, mean)
+            m2 = np.where(has, m2 + c_m2 + delta ** 2 * n * c_n / total, m2)
+        n = total
+        lo = np.fmin(lo, np.fmin.reduce(values, axis=0, initial=np.inf))
+        hi = np.fmax(hi, np.fmax.reduce(values, axis=0, initial=-np.inf))
+    
+    if not rows:
+        return None
+    
+    blocks = []
+    if len(numeric):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.where(n > 1, np.sqrt(m2 / (n - 1)), np.nan)
+        empty = n == 0
+        blocks.append(pd.DataFrame(
+            [n, np.where(empty, np.nan, mean), std, np.where(empty, np.nan, lo), np.where(empty, np.nan, hi)],
+            index=["count", "mean", "std", "min", "max"], columns=numeric,
+        ))
+    other = columns.drop(numeric)
+    if len(other):
+        blocks.append(pd.DataFrame([counts[other].to_numpy()], index=["count"], columns=other))
+    return pd.concat(blocks, axis=1)[columns]
+
+
 @tool
 def profile_table(file: str) -> str:
     """Generate a statistical profile (summary statistics) of the input dataset.
@@ -19,8 +220,67 @@ def profile_table(file: str) -> str:
     Returns:
         str: A string representation of the dataset's descriptive statistics.
     """
-    df = pd.read_csv(file)
-    return str(df.describe(include="all"))
+    if os.path.getsize(file) > PROFILE_STREAM_BYTES:
+        profile = _streaming_profile(file)
+        return "empty" if profile is None else str(profile)
+    
+    df = _load_csv(file)
+    if df.empty:
+        return "empty"
+    
+    # Moments for numeric columns; one value_counts pass for everything else
+    # (no quantile sorts, no separate unique() pass)
+    numeric = df.select_dtypes("number")
+    blocks = []
+    if len(numeric.columns):
+        blocks.append(numeric.agg(["count", "mean", "std", "min", "max"]))
+    other = {}
+    for col in df.columns.drop(numeric.columns):
+        counts = df[col].value_counts()
+        other[col] = {
+            "count": df[col].count(),
+            "unique": len(counts),
+            "top": counts.index[0] if len(counts) else None,
+            "freq": counts.iloc[0] if len(counts) else None,
+        }
+    if other:
+        blocks.append(pd.DataFrame(other))
+    return str(pd.concat(blocks, axis=1)[df.columns])
+
+
+# Column names treated as dates/times when given as a chart's x-axis
+_DATE_COLUMN_RE = re.compile(r"date|time", re.IGNORECASE)
+
+
+# Parsed date columns keyed on (CSV cache key, column), least recently used
+# first; kept apart from _CSV_CACHE so cached frames are never modified
+_PARSED_DATES_SIZE = 32
+_PARSED_DATES = OrderedDict()
+
+
+def _parse_dates(csv_key, df: pd.DataFrame, col: str) -> pd.Series:
+    """Return a date/time-named text column parsed to datetimes, parsing it once per file version."""
+    series = df[col]
+    if (_DATE_COLUMN_RE.search(col) is None
+            or pd.api.types.is_datetime64_any_dtype(series)
+            or pd.api.types.is_numeric_dtype(series)):
+        return series
+    key = (csv_key, col)
+    with _CSV_CACHE_LOCK:
+        parsed = _PARSED_DATES.get(key)
+        if parsed is not None:
+            _PARSED_DATES.move_to_end(key)
+            return parsed
+    
+    parsed = pd.to_datetime(series, format="ISO8601", errors="coerce", cache=True)
+    if parsed.isna().all():
+        parsed = series
+    with _CSV_CACHE_LOCK:
+        _PARSED_DATES[key] = parsed
+        _PARSED_DATES.move_to_end(key)
+        while len(_PARSED_DATES) > _PARSED_DATES_SIZE:
+            _PARSED_DATES.popitem(last=False)
+    return parsed
 
 
 @tool
@@ -36,11 +296,13 @@ def plot_chart(file: str, x: str, y: str, out: str = "plot.png") -> str:
     Returns:
         str: A message with the path where the chart image was saved.
     """
-    df = pd.read_csv(file)
-    plt.figure(figsize=(8, 5))
-    plt.plot(df[x], df[y])
+    csv_key, df = _load_csv_keyed(file)
     path = _ensure_outputs_path(out, "plot.png")
-    plt.savefig(path)
+    xs, ys = _downsample(_to_plot_array(_parse_dates(csv_key, df, x)), _to_plot_array(df[y]))
+    with _PLOT_LOCK:
+        fig, ax = _get_axes()
+        ax.plot(xs, ys)
+        fig.savefig(path, dpi=PLOT_DPI, pil_kwargs=PLOT_PNG_KWARGS)
     return f"Saved plot to {path}"
 
 
@@ -4,35 +4,182 @@ Web interface for LangGraph Table Agent
 Provides a simple web UI to interact with the agent
 """
 
-from fastapi import FastAPI, WebSocket, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi.responses import JSONResponse, Response, FileResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.websockets import WebSocketState
 import asyncio
+import gzip
+import hashlib
+import html
+import importlib
 import json
+import orjson
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from agents.graph_agent import build_graph
+from agents.llm_factory import get_async_http_client, get_http_client
 from langchain_core.messages import HumanMessage, AIMessage
+import logging
 import os
+import re
+
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="LangGraph Table Agent")
 
-# Build the agent graph once
-print("Initializing LangGraph agent...")
+# The agent graph is built in the background after startup, once per worker
+# process; _agent_init is the task building it
 graph = None
-try:
-    graph = build_graph()
-    print("Agent initialized successfully")
-except Exception as e:
-    print(f"Warning: Could not initialize agent: {e}")
+_agent_init = None
 
-# Serve output files
-if os.path.exists("outputs"):
-    app.mount("/outputs", StaticFiles(directory="outputs"), name="outputs")
+# Number of uvicorn worker processes; each WebSocket stays on the worker that
+# accepted it, so no sticky routing is needed in front of them
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))
 
-@app.get("/")
-async def home():
-    """Serve the web interface"""
-    return HTMLResponse(content="""
+# Threads for blocking work under the event loop (tool calls, sync LLM clients)
+EXECUTOR_WORKERS = 32
+
+@app.on_event("startup")
+async def configure_executor():
+    """Size the default executor so concurrent sessions don't queue for threads"""
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS))
+
+# WebSocket keepalive: ping every WS_PING_INTERVAL seconds, drop the
+# connection if no pong arrives within WS_PING_TIMEOUT seconds
+WS_PING_INTERVAL = 30.0
+WS_PING_TIMEOUT = 20.0
+
+# Stream agent tokens to the page as they are generated instead of sending
+# whole replies
+STREAM_RESPONSES = os.getenv("ENABLE_RESPONSE_STREAMING", "true").lower() == "true"
+
+# Agent runs allowed in flight at once across all connections of a worker;
+# further requests wait for a slot, which bounds memory under bursts
+AGENT_CONCURRENCY = int(os.getenv("AGENT_CONCURRENCY", "4"))
+_AGENT_SLOTS = asyncio.Semaphore(AGENT_CONCURRENCY)
+
+# Messages a connection may have waiting for the agent before reads pause
+MESSAGE_QUEUE_SIZE = 16
+
+async def _init_agent():
+    """Build this worker's agent graph off the event loop"""
+    global graph
+    logger.info("Initializing LangGraph agent...")
+    try:
+        graph = await asyncio.to_thread(build_graph)
+        logger.info("Agent initialized successfully")
+    except Exception:
+        logger.exception("Could not initialize agent")
+
+@app.on_event("startup")
+async def start_agent():
+    """Start building the agent without holding up the server"""
+    global _agent_init
+    _agent_init = asyncio.create_task(_init_agent())
+
+@app.on_event("shutdown")
+async def stop_agent():
+    """Stop background agent work and close pooled LLM connections"""
+    if _agent_init is not None:
+        _agent_init.cancel()
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
+    if get_async_http_client.cache_info().currsize:
+        await get_async_http_client().aclose()
+
+# Recent agent responses keyed by conversation and normalized prompt, evicted
+# least-recently-used. Values are (reply text, rendered HTML, input file stats);
+# an entry is only reused while the files its tools read are unchanged.
+RESPONSE_CACHE_SIZE = 256
+_RESPONSE_CACHE = OrderedDict()
+
+# Replies from runs that called these tools are never cached: the files they
+# write can be overwritten by later requests, so replaying the reply could
+# point at the wrong output
+UNCACHEABLE_TOOLS = {"plot_chart"}
+
+# Earlier turns sent with each prompt are trimmed, oldest first, to about
+# this many tokens (~4 characters per token)
+HISTORY_MAX_TOKENS = 2000
+
+def _cache_key(user_message: str, history: list) -> bytes:
+    """Hash the earlier turns and the prompt, with the prompt's case and surrounding whitespace ignored"""
+    digest = hashlib.blake2b(digest_size=16)
+    for message in history:
+        digest.update(message.content.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(user_message.strip().lower().encode("utf-8"))
+    return digest.digest()
+
+def _trim_history(history: list, max_tokens: int = HISTORY_MAX_TOKENS):
+    """Drop the oldest (question, reply) pairs until the history fits max_tokens"""
+    chars = sum(len(m.content) for m in history)
+    while history and chars > max_tokens * 4:
+        chars -= len(history[0].content) + len(history[1].content)
+        del history[:2]
+
+def _file_stats(paths) -> tuple:
+    """Return sorted (path, mtime_ns, size) tuples for the files, or None if any is missing"""
+    stats = []
+    for path in sorted(paths):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        stats.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(stats)
+
+def _cached_response(key: bytes):
+    """Return the cached (reply text, rendered HTML) for key, or None if absent or stale"""
+    entry = _RESPONSE_CACHE.get(key)
+    if entry is None:
+        return None
+    answer, response, stats = entry
+    if _file_stats(path for path, _, _ in stats) != stats:
+        del _RESPONSE_CACHE[key]
+        return None
+    _RESPONSE_CACHE.move_to_end(key)
+    return answer, response
+
+def _cache_response(key: bytes, answer: str, response: str, tool_runs: list):
+    """Store a reply unless its run wrote files; remember the stats of the files it read
+    
+    tool_runs holds the (tool name, input) pairs seen during the run; the final
+    graph state can't be used since it only keeps the last message.
+    """
+    if any(name in UNCACHEABLE_TOOLS for name, _ in tool_runs):
+        return
+    stats = _file_stats({args["file"] for _, args in tool_runs
+                         if isinstance(args, dict) and isinstance(args.get("file"), str)})
+    if stats is None:
+        return
+    _RESPONSE_CACHE[key] = (answer, response, stats)
+    _RESPONSE_CACHE.move_to_end(key)
+    if len(_RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+        _RESPONSE_CACHE.popitem(last=False)
+
+# Charts are rewritten in place (plot.png by default), so browsers may keep
+# them but must revalidate; an unchanged file costs a 304 with no body
+OUTPUTS_CACHE_CONTROL = "public, no-cache"
+
+class OutputFiles(StaticFiles):
+    """StaticFiles that marks generated charts as cacheable with revalidation"""
+    
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["cache-control"] = OUTPUTS_CACHE_CONTROL
+        return response
+
+# Serve output files; the directory is created up front so charts written
+# after startup are served without a restart
+Path("outputs").mkdir(exist_ok=True)
+app.mount("/outputs", OutputFiles(directory="outputs"), name="outputs")
+
+# The web interface is static, so encode it once at import time
+_HTML = """
 <!DOCTYPE html>
 <html>
 <head>
@@ -186,10 +333,13 @@ async def home():
     <script>
         let ws = null;
         let isConnected = false;
+        const decoder = new TextDecoder();
+        const TAG_CHUNK = 1;
         
         function connect() {
             const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
             ws = new WebSocket(`${protocol}//${window.location.host}/ws`);
+            ws.binaryType = 'arraybuffer';
             
             ws.onopen = () => {
                 isConnected = true;
@@ -198,12 +348,19 @@ async def home():
             };
             
             ws.onmessage = (event) => {
-                const data = JSON.parse(event.data);
+                // Streamed tokens: tag byte 1 + UTF-8 text; anything else is JSON
+                const bytes = new Uint8Array(event.data);
+                if (bytes[0] === TAG_CHUNK) {
+                    appendChunk(decoder.decode(bytes.subarray(1)));
+                    return;
+                }
+                const data = JSON.parse(decoder.decode(bytes));
                 
-                if (data.type === 'response') {
-                    addMessage(data.content, 'agent');
+                if (data.type === 'response' || data.type === 'done') {
+                    finishMessage(data.content);
                 } else if (data.type === 'error') {
                     setStatus('Error: ' + data.content, 'error');
+                    streamDiv = null;
                     addMessage('Error: ' + data.content, 'agent');
                 } else if (data.type === 'status') {
                     setStatus(data.content, 'info');
@@ -218,9 +375,17 @@ async def home():
                 isConnected = false;
             };
             
-            ws.onclose = () => {
-                setStatus('Disconnected. Reconnecting...', 'warning');
+            ws.onclose = (event) => {
                 isConnected = false;
+                
+                // 1011: the server is up but the agent is not, retrying won't help
+                if (event.code === 1011) {
+                    setStatus('Error: ' + (event.reason || 'Agent unavailable'), 'error');
+                    document.getElementById('sendBtn').disabled = true;
+                    return;
+                }
+                
+                setStatus('Disconnected. Reconnecting...', 'warning');
                 setTimeout(connect, 3000);
             };
         }
@@ -244,24 +409,37 @@ async def home():
             input.value = '';
         }
         
-        function addMessage(content, sender) {
+        // Agent message currently being streamed, and its raw text so far
+        let streamDiv = null;
+        let streamText = '';
+        
+        function appendChunk(text) {
+            if (!streamDiv) {
+                streamDiv = addMessage('', 'agent');
+                streamText = '';
+            }
+            streamText += text;
+            streamDiv.textContent = streamText;
+            document.getElementById('chat').scrollTop = document.getElementById('chat').scrollHeight;
+        }
+        
+        function finishMessage(html) {
+            // Agent replies arrive already escaped and formatted by the server;
+            // replace the streamed plain text with them
+            const messageDiv = streamDiv || addMessage('', 'agent');
+            streamDiv = null;
+            messageDiv.innerHTML = html;
+            document.getElementById('chat').scrollTop = document.getElementById('chat').scrollHeight;
+        }
+        
+        function addMessage(text, sender) {
             const chat = document.getElementById('chat');
             const messageDiv = document.createElement('div');
             messageDiv.className = `message ${sender}-message`;
-            
-            // Convert markdown-like formatting
-            content = content.replace(/```(.*?)```/gs, '<pre>$1</pre>');
-            content = content.replace(/`([^`]+)`/g, '<code>$1</code>');
-            
-            // Check for image references
-            if (content.includes('.png') || content.includes('.jpg')) {
-                content = content.replace(/(outputs\/[^\s]+\.(png|jpg|jpeg))/g, 
-                    '<br><img src="/$1" alt="Generated chart"><br>');
-            }
-            
-            messageDiv.innerHTML = content;
+            messageDiv.textContent = text;
             chat.appendChild(messageDiv);
             chat.scrollTop = chat.scrollHeight;
+            return messageDiv;
         }
         
         function setStatus(message, type) {
@@ -297,81 +475,246 @@ async def home():
     </script>
 </body>
 </html>
-    """)
+    """
+_HTML_BYTES = _HTML.encode("utf-8")
+_HTML_HEADERS = {"cache-control": "public, max-age=300", "vary": "Accept-Encoding"}
+_HTML_GZIP = gzip.compress(_HTML_BYTES, 6)
+_HTML_GZIP_HEADERS = {**_HTML_HEADERS, "content-encoding": "gzip"}
+
+@app.get("/")
+async def home(request: Request):
+    """Serve the web interface, gzipped when the client accepts it"""
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(content=_HTML_GZIP, media_type="text/html; charset=utf-8", headers=_HTML_GZIP_HEADERS)
+    return Response(content=_HTML_BYTES, media_type="text/html; charset=utf-8", headers=_HTML_HEADERS)
+
+# Markdown-like formatting applied to agent replies before they are sent
+_CODE_BLOCK_RE = re.compile(r"```(.*?)```", re.S)
+_INLINE_CODE_RE = re.compile(r"`([^`]+)`")
+_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+_IMAGE_REF_RE = re.compile(r"(outputs/[^\s]+\.(png|jpg|jpeg))")
+
+def _render_html(text: str) -> str:
+    """Escape an agent reply and render its code spans and chart references as HTML"""
+    text = html.escape(text)
+    text = _CODE_BLOCK_RE.sub(r"<pre>\1</pre>", text)
+    text = _INLINE_CODE_RE.sub(r"<code>\1</code>", text)
+    if any(ext in text for ext in _IMAGE_EXTENSIONS):
+        text = _IMAGE_REF_RE.sub(r'<br><img src="/\1" alt="Generated chart"><br>', text)
+    return text
+
+def _optional_error(module: str, name: str):
+    """Return an exception class from an optional provider SDK, or None if it isn't installed"""
+    try:
+        return getattr(importlib.import_module(module), name)
+    except (ImportError, AttributeError):
+        return None
+
+# Failures common enough under load to get their own message. The frames are
+# serialized once since they are sent repeatedly while the condition lasts.
+_RATE_LIMIT_ERRORS = tuple(filter(None, [
+    _optional_error("openai", "RateLimitError"),
+    _optional_error("anthropic", "RateLimitError"),
+]))
+_TIMEOUT_ERRORS = (TimeoutError, asyncio.TimeoutError) + tuple(filter(None, [
+    _optional_error("httpx", "TimeoutException"),
+]))
+_STATUS_PROCESSING = orjson.dumps({"type": "status", "content": "Processing your request..."})
+_STATUS_QUEUED = orjson.dumps({"type": "status", "content": "Agent is busy, your request is queued..."})
+_ERROR_RATE_LIMITED = orjson.dumps({
+    "type": "error",
+    "content": "The language model is rate limited. Please try again shortly."
+})
+_ERROR_TIMEOUT = orjson.dumps({
+    "type": "error",
+    "content": "The language model took too long to respond. Please try again."
+})
+
+async def _send(websocket: WebSocket, frame: dict):
+    """Send a frame as orjson-encoded bytes (the page decodes binary frames)"""
+    await websocket.send_bytes(orjson.dumps(frame))
+
+# Streamed tokens go out as this tag byte followed by the raw UTF-8 text,
+# skipping JSON for the most frequent frame. Every other frame is a JSON
+# object, whose first byte is always "{".
+TAG_CHUNK = b"\x01"
+
+async def _run_agent(websocket: WebSocket, inputs: dict):
+    """Run the agent, streaming its text as chunk frames unless disabled
+    
+    Returns:
+        (final state, list of (tool name, input) pairs for every tool call)
+    """
+    result = None
+    tool_runs = []
+    async for event in graph.astream_events(inputs, version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_stream":
+            content = event["data"]["chunk"].content
+            if STREAM_RESPONSES and isinstance(content, str) and content:
+                await websocket.send_bytes(TAG_CHUNK + content.encode("utf-8"))
+        elif kind == "on_tool_start":
+            tool_runs.append((event["name"], event["data"].get("input")))
+            await _send(websocket, {"type": "status", "content": f"Running {event['name']}..."})
+        elif kind == "on_chain_end" and not event["parent_ids"]:
+            result = event["data"].get("output")
+    return result, tool_runs
+
+async def _handle_message(websocket: WebSocket, user_message: str, history: list):
+    """Run one user message through the agent, send the reply and record the turn in history"""
+    # Send status
+    await websocket.send_bytes(_STATUS_PROCESSING)
+    
+    try:
+        # Repeated questions in the same conversation are answered from the cache
+        key = _cache_key(user_message, history)
+        cached = _cached_response(key)
+        if cached is not None:
+            answer, response = cached
+            await _send(websocket, {
+                "type": "response",
+                "content": response
+            })
+        else:
+            # Process with agent, streamed token by token unless disabled
+            inputs = {"messages": history + [HumanMessage(content=user_message)]}
+            if _AGENT_SLOTS.locked():
+                await websocket.send_bytes(_STATUS_QUEUED)
+            async with _AGENT_SLOTS:
+                result, tool_runs = await _run_agent(websocket, inputs)
+            
+            # Extract response
+            answer = None
+            if result and "messages" in result:
+                last_message = result["messages"][-1]
+                
+                # Content may be a list of blocks (e.g. Anthropic); keep plain text
+                if isinstance(last_message, AIMessage) and isinstance(last_message.content, str):
+                    answer = last_message.content
+                else:
+                    answer = str(last_message.content)
+                
+                # Check if any files were created
+                response = answer
+                if "outputs" in response or ".png" in response or ".jpg" in response:
+                    response += "\n\n📊 Chart saved to outputs folder."
+                response = _render_html(response)
+                _cache_response(key, answer, response, tool_runs)
+            else:
+                response = "I processed your request but couldn't generate a response."
+            
+            # Send the rendered response ("done" completes the streamed message)
+            await _send(websocket, {
+                "type": "done" if STREAM_RESPONSES else "response",
+                "content": response
+            })
+        
+        if answer is not None:
+            history.append(HumanMessage(content=user_message))
+            history.append(AIMessage(content=answer))
+            _trim_history(history)
+        
+    except WebSocketDisconnect:
+        raise
+    except _RATE_LIMIT_ERRORS:
+        logger.warning("LLM rate limit hit while processing a request")
+        await websocket.send_bytes(_ERROR_RATE_LIMITED)
+    except _TIMEOUT_ERRORS:
+        logger.warning("LLM request timed out")
+        await websocket.send_bytes(_ERROR_TIMEOUT)
+    except Exception as e:
+        logger.exception("Error processing request")
+        await _send(websocket, {
+            "type": "error",
+            "content": f"Error processing request: {str(e)}"
+        })
+
+async def _process_messages(websocket: WebSocket, queue: asyncio.Queue):
+    """Answer queued user messages one at a time, in arrival order"""
+    # The conversation so far, as (question, reply) message pairs
+    history = []
+    while True:
+        user_message = await queue.get()
+        try:
+            await _handle_message(websocket, user_message, history)
+        finally:
+            queue.task_done()
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time chat"""
     await websocket.accept()
     
+    # Connections made while the agent is still being built wait for it
+    if _agent_init is not None:
+        await asyncio.shield(_agent_init)
+    
+    # Close with 1011 so the page shows the error and stops reconnecting.
+    # (Closing before accept() would reject the handshake, which browsers
+    # only report as an anonymous 1006.)
     if not graph:
-        await websocket.send_json({
-            "type": "error",
-            "content": "Agent not initialized. Please check LLM configuration."
-        })
+        await websocket.close(code=1011, reason="Agent not initialized. Please check LLM configuration.")
         return
     
+    # The reader only drains the socket; a worker task runs the agent, so the
+    # connection keeps being read while a long request is in progress. The
+    # bounded queue pushes back on clients that send faster than we answer.
+    queue = asyncio.Queue(maxsize=MESSAGE_QUEUE_SIZE)
+    worker = asyncio.create_task(_process_messages(websocket, queue))
+    
     try:
         while True:
             # Receive message from client
-            data = await websocket.receive_json()
+            data = orjson.loads(await websocket.receive_text())
             
             if data["type"] == "message":
-                user_message = data["content"]
-                
-                # Send status
-                await websocket.send_json({
-                    "type": "status",
-                    "content": "Processing your request..."
-                })
-                
-                try:
-                    # Process with agent
-                    messages = [HumanMessage(content=user_message)]
-                    result = graph.invoke({"messages": messages})
-                    
-                    # Extract response
-                    if result and "messages" in result:
-                        last_message = result["messages"][-1]
-                        
-                        if isinstance(last_message, AIMessage):
-                            response = last_message.content
-                        else:
-                            response = str(last_message.content)
-                        
-                        # Check if any files were created
-                        if "outputs" in response or ".png" in response or ".jpg" in response:
-                            response += "\n\n📊 Chart saved to outputs folder."
-                    else:
-                        response = "I processed your request but couldn't generate a response."
-                    
-                    # Send response
-                    await websocket.send_json({
-                        "type": "response",
-                        "content": response
-                    })
-                    
-                except Exception as e:
-                    await websocket.send_json({
-                        "type": "error",
-                        "content": f"Error processing request: {str(e)}"
-                    })
+                await queue.put(data["content"])
     
-    except Exception as e:
-        print(f"WebSocket error: {e}")
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        logger.exception("WebSocket error")
     finally:
-        await websocket.close()
+        worker.cancel()
+        # Wait for the worker to stop; a send to the departed client may have
+        # failed there, which is expected at this point
+        await asyncio.gather(worker, return_exceptions=True)
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close()
 
 @app.get("/health")
 async def health():
-    """Health check endpoint"""
+    """Health check endpoint, 503 until the agent is initialized"""
+    if graph is None:
+        return JSONResponse(status_code=503, content={
+            "status": "starting" if _agent_init is None or not _agent_init.done() else "unhealthy",
+            "agent_initialized": False
+        })
     return {
         "status": "healthy",
-        "agent_initialized": graph is not None
+        "agent_initialized": True
     }
 
 if __name__ == "__main__":
+    import importlib.util
     import uvicorn
     print("Starting LangGraph Table Agent Web UI...")
     print("Access the interface at: http://localhost:8000")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # uvloop and httptools (both in uvicorn[standard]) are used where they are
+    # installed; uvloop has no Windows build. The websockets implementation is
+    # pinned because it is the one that honours the ping settings. The app is
+    # passed as an import string so uvicorn can start WEB_WORKERS processes. Server pings
+    # keep idle connections alive through proxies/NATs and detect dead peers,
+    # instead of the page reconnecting after a silent drop.
+    uvicorn.run(
+        "web_app:app",
+        workers=WEB_WORKERS,
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        ws="websockets",
+        ws_per_message_deflate=True,
+        ws_ping_interval=WS_PING_INTERVAL,
+        ws_ping_timeout=WS_PING_TIMEOUT
+    )
\ No newline at end of file